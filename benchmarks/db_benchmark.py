@@ -0,0 +1,95 @@
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fpl_bot
+
+# Seeds a scratch copy of the user database with linked users at increasing sizes and times
+# the lookups the bot makes, to check they stay O(log n) as the table grows. Also prints the
+# query plans, which should search the primary key and idx_users_fpl_id rather than scan.
+# Run from the repository root: python benchmarks/db_benchmark.py [max_users]
+
+MAX_USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+SIZES = [size for size in (1_000, 10_000, 100_000, 1_000_000) if size <= MAX_USERS] or [MAX_USERS]
+LOOKUPS = 2000
+
+async def seed_users(db, start, end):
+    await db.executemany(
+        'INSERT INTO users (discord_id, fpl_id, team_name) VALUES (?, ?, ?)',
+        ((10**17 + i, 1_000_000 + i, f"Team {i}") for i in range(start, end))
+    )
+    await db.executemany(
+        'INSERT OR IGNORE INTO guild_leagues (guild_id, league_id) VALUES (?, ?)',
+        ((10**17 + i, 100 + i % 5000) for i in range(start, end, 10))
+    )
+    await db.commit()
+
+async def find_discord_users(fpl_ids):
+    placeholders = ', '.join('?' * len(fpl_ids))
+    async with fpl_bot.user_db.execute(f'SELECT fpl_id, discord_id FROM users WHERE fpl_id IN ({placeholders})', fpl_ids) as cursor:
+        return await cursor.fetchall()
+
+async def find_guilds(league_id):
+    async with fpl_bot.user_db.execute('SELECT guild_id FROM guild_leagues WHERE league_id = ?', (league_id,)) as cursor:
+        return await cursor.fetchall()
+
+async def time_lookups(size):
+    ids = [random.randrange(size) for _ in range(LOOKUPS)]
+
+    start = time.perf_counter()
+    for i in ids:
+        async with fpl_bot.user_db.execute('SELECT fpl_id FROM users WHERE discord_id = ?', (10**17 + i,)) as cursor:
+            await cursor.fetchone()
+    by_discord_id = (time.perf_counter() - start) / LOOKUPS
+
+    start = time.perf_counter()
+    for i in ids:
+        await find_discord_users([1_000_000 + i])
+    by_fpl_id = (time.perf_counter() - start) / LOOKUPS
+
+    start = time.perf_counter()
+    for i in ids[:LOOKUPS // 10]:
+        await find_guilds(100 + i % 5000)
+    by_league = (time.perf_counter() - start) / (LOOKUPS // 10)
+
+    # A whole leaderboard page of reverse lookups at once
+    start = time.perf_counter()
+    await find_discord_users([1_000_000 + i for i in ids[:50]])
+    page = time.perf_counter() - start
+
+    return by_discord_id, by_fpl_id, by_league, page
+
+async def print_query_plans():
+    queries = [
+        ('SELECT fpl_id FROM users WHERE discord_id = ?', (1,)),
+        ('SELECT fpl_id, discord_id FROM users WHERE fpl_id IN (?, ?)', (1, 2)),
+        ('SELECT guild_id FROM guild_leagues WHERE league_id = ?', (1,)),
+    ]
+    for query, params in queries:
+        async with fpl_bot.user_db.execute(f'EXPLAIN QUERY PLAN {query}', params) as cursor:
+            plan = '; '.join(row[-1] for row in await cursor.fetchall())
+        print(f"  {query}\n    -> {plan}")
+
+async def main():
+    with tempfile.TemporaryDirectory() as directory:
+        fpl_bot.DATABASE_PATH = os.path.join(directory, 'fpl_users.db')
+        await fpl_bot.open_database()
+        try:
+            print(f"{'users':>9}  {'by discord_id':>14}  {'by fpl_id':>10}  {'by league':>10}  {'50-entry page':>14}")
+            seeded = 0
+            for size in SIZES:
+                await seed_users(fpl_bot.user_db, seeded, size)
+                seeded = size
+                results = await time_lookups(size)
+                print(f"{size:>9}  " + "  ".join(f"{value * 1e6:>{width - 2}.1f}us" for value, width in zip(results, (14, 10, 10, 14))))
+            print("Query plans:")
+            await print_query_plans()
+        finally:
+            await fpl_bot.close_database()
+
+if __name__ == "__main__":
+    asyncio.run(main())
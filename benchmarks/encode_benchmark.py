@@ -0,0 +1,63 @@
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fpl_bot
+
+# Renders a sample league table, full-season fixture grid and 50-row leaderboard from made-up
+# data, then encodes each with every option in IMAGE_ENCODINGS and reports the encode time
+# and upload size. Set FPL_BOT_IMAGE_FORMAT (or FPL_BOT_<COMMAND>_IMAGE_FORMAT) to pick one.
+# Run from the repository root: python benchmarks/encode_benchmark.py [runs]
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+TEAMS = ['ARS', 'AVL', 'BOU', 'BRE', 'BHA', 'CHE', 'CRY', 'EVE', 'FUL', 'IPS',
+         'LEI', 'LIV', 'MCI', 'MUN', 'NEW', 'NFO', 'SOU', 'TOT', 'WHU', 'WOL']
+
+def sample_table():
+    return [{
+        'position': i + 1, 'name': f"Team {i + 1}", 'played': 10, 'win': 10 - i // 2, 'draw': i % 3, 'loss': i // 2,
+        'goals_for': 30 - i, 'goals_against': 5 + i, 'goal_difference': 25 - 2 * i, 'points': 40 - 2 * i
+    } for i in range(20)]
+
+def sample_fixture_grid_args():
+    season = {}
+    for team in TEAMS:
+        opponents = random.sample([t for t in TEAMS if t != team] * 2, fpl_bot.SEASON_GAMEWEEKS)
+        season[team] = [{'opponent': opp.upper() if gw % 2 else opp.lower(), 'fdr': random.randint(1, 5)} for gw, opp in enumerate(opponents)]
+    gw_dates = {gw: f"{gw % 28 + 1:02d}/{gw % 12 + 1:02d}" for gw in range(1, fpl_bot.SEASON_GAMEWEEKS + 1)}
+    team_names = {team: f"Team {team}" for team in TEAMS}
+    return (season, fpl_bot.SEASON_GAMEWEEKS, 1, team_names, gw_dates, 'alphabetical', {}, {}, {}, season, None)
+
+def sample_leaderboard():
+    return [{
+        'rank': i + 1, 'last_rank': i + random.randint(-3, 3) + 1, 'entry_name': f"Entry {i + 1}",
+        'player_name': f"Manager {i + 1}", 'event_total': random.randint(20, 90), 'total': 1500 - 7 * i,
+        'value': random.randint(980, 1040), 'overall_rank': random.randint(1, 9_000_000)
+    } for i in range(fpl_bot.LEADERBOARD_ROWS_PER_IMAGE)]
+
+def main():
+    random.seed(0)
+    images = {
+        'table': fpl_bot.create_table_image(sample_table()),
+        'fixtures': fpl_bot.create_fixture_grid(*sample_fixture_grid_args()),
+        'leaderboard': fpl_bot.create_leaderboard_image(sample_leaderboard()),
+    }
+
+    for name, image in images.items():
+        print(f"{name} ({image.width}x{image.height})")
+        baseline = None
+        for encoding in fpl_bot.IMAGE_ENCODINGS:
+            times = []
+            for _ in range(RUNS):
+                start = time.perf_counter()
+                data = fpl_bot.encode_image(image, encoding)
+                times.append((time.perf_counter() - start) * 1000)
+            baseline = baseline or len(data)
+            print(f"  {encoding:>8}: median {statistics.median(times):7.1f}ms  {len(data) / 1024:8.1f}KB  ({len(data) / baseline:.0%} of png)")
+
+if __name__ == "__main__":
+    main()
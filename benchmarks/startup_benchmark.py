@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import statistics
+import sys
+import tempfile
+
+# Measures bot startup without connecting to Discord: the time to import fpl_bot and to run
+# its setup_hook, in a fresh interpreter each run. Also reports which heavy libraries were
+# imported by then, to check that rendering and fuzzy matching stay lazy.
+# Run from the repository root: python benchmarks/startup_benchmark.py [runs]
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+CHILD_SCRIPT = '''
+import asyncio, json, os, sys, time
+start = time.perf_counter()
+import fpl_bot
+imported = time.perf_counter()
+# Keep the benchmark away from the real user database
+fpl_bot.DATABASE_PATH = os.path.join(os.environ['FPL_BOT_CACHE_DIR'], 'fpl_users.db')
+
+async def main():
+    hook_start = time.perf_counter()
+    await fpl_bot.bot.setup_hook()
+    hook_time = time.perf_counter() - hook_start
+    await fpl_bot.close_http_session()
+    await fpl_bot.close_http_cache()
+    await fpl_bot.close_database()
+    return hook_time
+
+hook_time = asyncio.run(main())
+heavy = [name for name in ('PIL.Image', 'rapidfuzz', 'fuzzywuzzy', 'requests') if name in sys.modules]
+print(json.dumps({'import': imported - start, 'setup_hook': hook_time, 'heavy_modules': heavy}))
+'''
+
+def run_once(cache_dir):
+    env = dict(os.environ, FPL_BOT_CACHE_DIR=cache_dir, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True, check=True
+    )
+    # The bot prints while importing; the measurements are on the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        results = [run_once(cache_dir) for _ in range(RUNS)]
+
+    for key in ('import', 'setup_hook'):
+        times = [r[key] * 1000 for r in results]
+        print(f"{key:>10}: median {statistics.median(times):7.1f}ms  min {min(times):7.1f}ms  max {max(times):7.1f}ms")
+    print(f"Heavy modules loaded at startup: {', '.join(results[0]['heavy_modules']) or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -2,23 +2,31 @@ import discord
 from discord.ext import commands
 import aiohttp
 import asyncio
-from fuzzywuzzy import process, fuzz
-import difflib
+import functools
+import bisect
+import unicodedata
 from datetime import datetime, timezone, timedelta
 from discord import Embed, Color
 import os
 from dotenv import load_dotenv
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import aiosqlite
-from PIL import Image, ImageDraw, ImageFont, ImageColor
 import io
 import json
-import requests
+import concurrent.futures
+import time
+import hashlib
+import random
+import urllib.parse
+import threading
 
 # Load environment variables
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 FOOTBALL_DATA_API_KEY = os.getenv('FOOTBALL_DATA_API_KEY')
+# Set FPL_BOT_DEBUG=1 to enable asyncio debug mode and the event loop lag monitor
+DEBUG = os.getenv('FPL_BOT_DEBUG', '').lower() in ('1', 'true', 'yes')
+LOOP_LAG_THRESHOLD = float(os.getenv('FPL_BOT_LOOP_LAG_THRESHOLD', '0.1'))  # Seconds
 
 # FDR color mapping
 def get_fdr_color(difficulty):
@@ -43,9 +51,29 @@ CUP_COLORS = {
 }
     
 # Bot setup
+# Startup only touches local files; anything that needs the network runs in warm_up()
+# once the bot has connected, so a slow or unreachable API can't delay or break startup.
+class FPLBot(commands.Bot):
+    async def setup_hook(self):
+        global current_pl_teams
+        # Open the shared HTTP session once the event loop is running
+        open_http_session()
+        await open_http_cache()
+        await open_database()
+        current_pl_teams = read_pl_teams_snapshot()
+        if DEBUG:
+            start_loop_lag_monitor()
+
+    async def close(self):
+        await super().close()
+        await close_http_session()
+        await close_http_cache()
+        await close_database()
+        shutdown_render_executor()
+
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+bot = FPLBot(command_prefix='!', intents=intents)
 
 # Team aliases for fuzzy matching
 team_aliases = {
@@ -71,19 +99,443 @@ team_aliases = {
     "Wolves": ["wolves", "wolverhampton", "wolverhampton wanderers", "wol", "wolves fc", "the wolves", "wolves", "wwfc"]
 }
 
+# Minimum fuzzy match score (0-100) for a team name that isn't an exact alias
+TEAM_MATCH_THRESHOLD = 80
+
+# Reverse mapping of lower-cased team names and aliases to team names, built once at import
+alias_to_team = {}
+for team, aliases in team_aliases.items():
+    alias_to_team[team.lower()] = team
+    for alias in aliases:
+        alias_to_team[alias.lower()] = team
+
+alias_choices = list(alias_to_team)
+
+# Aliases pre-processed for rapidfuzz, so each lookup only has to process the query.
+# Built on first use so rapidfuzz isn't imported until a fuzzy lookup is needed.
+@functools.lru_cache(maxsize=None)
+def get_processed_alias_choices():
+    from rapidfuzz import utils as rf_utils
+    return [rf_utils.default_process(alias) for alias in alias_choices]
+
+# Resolve user input to a team name from team_aliases: exact alias match first, then the
+# best fuzzy match above TEAM_MATCH_THRESHOLD. Returns None if nothing matches.
+@functools.lru_cache(maxsize=1024)
+def resolve_team(name):
+    query = name.strip().lower()
+    if query in alias_to_team:
+        return alias_to_team[query]
+
+    from rapidfuzz import process as rf_process, fuzz as rf_fuzz, utils as rf_utils
+    match = rf_process.extractOne(
+        rf_utils.default_process(query),
+        get_processed_alias_choices(),
+        scorer=rf_fuzz.WRatio,
+        processor=None,
+        score_cutoff=TEAM_MATCH_THRESHOLD
+    )
+    if match is None:
+        return None
+    best_match, score, index = match
+    print(f"Fuzzy matched '{name}' to '{alias_choices[index]}' (score: {score:.0f})")
+    return alias_to_team[alias_choices[index]]
+
 # Base URL for the FPL API
 FPL_API_BASE = "https://fantasy.premierleague.com/api/"
 
-# Function to fetch data from the FPL API
+# Connection pool settings for the shared HTTP session
+HTTP_POOL_LIMIT = 30  # Total simultaneous connections
+HTTP_POOL_LIMIT_PER_HOST = 10
+HTTP_DNS_CACHE_TTL = 300  # Seconds to reuse resolved addresses
+HTTP_KEEPALIVE_TIMEOUT = 60  # Seconds to keep idle connections open
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+
+# One HTTP session for the lifetime of the bot, so connections, TLS sessions and DNS results are reused
+http_session = None
+
+def open_http_session():
+    global http_session
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+        )
+        http_session = aiohttp.ClientSession(connector=connector, timeout=HTTP_TIMEOUT)
+    return http_session
+
+# Session used by every fetch; opened on demand if a request arrives before setup_hook has run
+def get_http_session():
+    return open_http_session()
+
+async def close_http_session():
+    global http_session
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+    http_session = None
+
+# Debug helper: report whenever the event loop is blocked for longer than LOOP_LAG_THRESHOLD
+async def monitor_loop_lag(interval=0.5):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = loop.time() - start - interval
+        if lag > LOOP_LAG_THRESHOLD:
+            print(f"Event loop lag: {lag * 1000:.0f}ms (threshold {LOOP_LAG_THRESHOLD * 1000:.0f}ms)")
+
+def start_loop_lag_monitor():
+    loop = asyncio.get_running_loop()
+    # asyncio's debug mode logs the individual callbacks that run longer than this
+    loop.set_debug(True)
+    loop.slow_callback_duration = LOOP_LAG_THRESHOLD
+    spawn_background(monitor_loop_lag())
+
+# Per-host circuit breaker: after CIRCUIT_FAILURE_THRESHOLD consecutive failures, requests to
+# that host fail fast for CIRCUIT_RESET_TIMEOUT seconds, then a single probe request is let
+# through to test whether it has recovered
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 60
+
+class CircuitOpenError(Exception):
+    pass
+
+# host -> {'failures': consecutive failures, 'opened_at': monotonic time or None, 'probe_started_at': monotonic time or None}
+circuit_breakers = {}
+
+def get_circuit_breaker(url):
+    host = urllib.parse.urlsplit(url).netloc
+    return host, circuit_breakers.setdefault(host, {'failures': 0, 'opened_at': None, 'probe_started_at': None})
+
+# Raise CircuitOpenError if requests to this URL's host should be short-circuited
+def check_circuit(url):
+    host, breaker = get_circuit_breaker(url)
+    if breaker['opened_at'] is None:
+        return
+    now = time.monotonic()
+    probe_running = breaker['probe_started_at'] is not None and now - breaker['probe_started_at'] < CIRCUIT_RESET_TIMEOUT
+    if now - breaker['opened_at'] < CIRCUIT_RESET_TIMEOUT or probe_running:
+        raise CircuitOpenError(f"{host} is not responding right now. Please try again in a minute.")
+    # Half-open: let this request through as the probe
+    breaker['probe_started_at'] = now
+    print(f"Circuit for {host} half-open, probing")
+
+def record_request_success(url):
+    host, breaker = get_circuit_breaker(url)
+    if breaker['opened_at'] is not None:
+        print(f"Circuit for {host} closed")
+    breaker.update(failures=0, opened_at=None, probe_started_at=None)
+
+def record_request_failure(url):
+    host, breaker = get_circuit_breaker(url)
+    breaker['failures'] += 1
+    if breaker['probe_started_at'] is not None or breaker['failures'] >= CIRCUIT_FAILURE_THRESHOLD:
+        if breaker['opened_at'] is None or breaker['probe_started_at'] is not None:
+            print(f"Circuit for {host} opened after {breaker['failures']} failures")
+        breaker.update(opened_at=time.monotonic(), probe_started_at=None)
+
+# Cache lifetimes in seconds for FPL API endpoints, matched by prefix (longest prefix wins).
+# Endpoints without an entry are always fetched fresh.
+FPL_CACHE_TTL = {
+    "bootstrap-static/": 300,
+    "fixtures/": 300,
+}
+# Refresh a cached endpoint in the background once this fraction of its TTL has passed
+FPL_REFRESH_AHEAD = 0.8
+# Expired data younger than this (seconds past its TTL) is served immediately while a
+# background refresh runs; older data is only served if the refresh fails
+FPL_STALE_WHILE_REVALIDATE = 3600
+
+# Cached FPL responses: endpoint -> {'data': parsed JSON, 'fetched_at': monotonic time, 'version': body hash,
+# 'etag' and 'last_modified': validators for conditional requests}
+fpl_cache = {}
+# Fetches currently in progress: endpoint -> task, so concurrent misses share a single request
+fpl_inflight = {}
+# Keep references to fire-and-forget tasks so they aren't garbage collected mid-run
+background_tasks = set()
+
+def get_cache_ttl(endpoint):
+    for prefix in sorted(FPL_CACHE_TTL, key=len, reverse=True):
+        if endpoint.startswith(prefix):
+            return FPL_CACHE_TTL[prefix]
+    return 0
+
+def spawn_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+# Run coro_factory() once per key; concurrent callers with the same key await the same task
+async def single_flight(inflight, key, coro_factory):
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(coro_factory())
+        inflight[key] = task
+        task.add_done_callback(lambda t: inflight.pop(key) if inflight.get(key) is t else None)
+    # Shield so one caller being cancelled doesn't cancel the fetch for everyone else
+    return await asyncio.shield(task)
+
+# Command results in progress, keyed by the command and its normalized arguments (including
+# guild settings such as the league ID), so a burst of identical commands runs the work once
+command_inflight = {}
+command_streams = {}
+
+def make_command_key(command, args):
+    return json.dumps([command, args], sort_keys=True, default=str)
+
+async def coalesce_command(command, args, coro_factory):
+    key = make_command_key(command, args)
+    if key in command_inflight:
+        print(f"Joining in-progress {command} request")
+    return await single_flight(command_inflight, key, coro_factory)
+
+# Like coalesce_command, for commands that produce a stream of results: the first caller's
+# generator runs in a task, and every concurrent caller receives each item as it's produced
+async def coalesce_command_stream(command, args, agen_factory):
+    key = make_command_key(command, args)
+    shared = command_streams.get(key)
+    if shared is None:
+        shared = {'items': [], 'done': False, 'error': None, 'updated': asyncio.Event()}
+        command_streams[key] = shared
+
+        def notify():
+            updated = shared['updated']
+            shared['updated'] = asyncio.Event()
+            updated.set()
+
+        async def pump():
+            try:
+                async for item in agen_factory():
+                    shared['items'].append(item)
+                    notify()
+            except Exception as e:
+                shared['error'] = e
+            finally:
+                shared['done'] = True
+                if command_streams.get(key) is shared:
+                    del command_streams[key]
+                notify()
+
+        spawn_background(pump())
+    else:
+        print(f"Joining in-progress {command} request")
+
+    index = 0
+    while True:
+        updated = shared['updated']
+        while index < len(shared['items']):
+            yield shared['items'][index]
+            index += 1
+        if shared['done']:
+            if shared['error'] is not None:
+                raise shared['error']
+            return
+        await updated.wait()
+
+# Responses for cached endpoints are also persisted to SQLite along with their validators
+# (ETag / Last-Modified), so a restart starts warm and unchanged data is revalidated with a 304
+HTTP_CACHE_DIR = os.getenv('FPL_BOT_CACHE_DIR', 'cache')
+HTTP_CACHE_DB = os.path.join(HTTP_CACHE_DIR, 'http_cache.db')
+
+http_cache_db = None
+
+async def open_http_cache():
+    global http_cache_db
+    if http_cache_db is not None:
+        return
+    os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+    http_cache_db = await aiosqlite.connect(HTTP_CACHE_DB)
+    await http_cache_db.execute('''
+        CREATE TABLE IF NOT EXISTS responses (
+            endpoint TEXT PRIMARY KEY,
+            body BLOB,
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at REAL
+        )
+    ''')
+    # Per-gameweek entry data that can no longer change (see fetch_entry_history)
+    await http_cache_db.execute('''
+        CREATE TABLE IF NOT EXISTS entry_records (
+            entry_id INTEGER,
+            kind TEXT,
+            event INTEGER,
+            body TEXT,
+            PRIMARY KEY (entry_id, kind, event)
+        ) WITHOUT ROWID
+    ''')
+    await http_cache_db.commit()
+
+async def close_http_cache():
+    global http_cache_db
+    if http_cache_db is not None:
+        await http_cache_db.close()
+    http_cache_db = None
+
+def make_cache_entry(body, data, etag, last_modified, fetched_at):
+    return {
+        'data': data,
+        'fetched_at': fetched_at,
+        'version': hashlib.sha1(body).hexdigest()[:16],
+        'etag': etag,
+        'last_modified': last_modified
+    }
+
+# Load a persisted response in the in-memory cache format, converting its wall-clock age
+async def load_persisted_response(endpoint):
+    if http_cache_db is None:
+        return None
+    async with http_cache_db.execute('SELECT body, etag, last_modified, fetched_at FROM responses WHERE endpoint = ?', (endpoint,)) as cursor:
+        row = await cursor.fetchone()
+    if row is None:
+        return None
+    body, etag, last_modified, fetched_at = row
+    age = max(time.time() - fetched_at, 0)
+    return make_cache_entry(body, json.loads(body), etag, last_modified, time.monotonic() - age)
+
+async def persist_response(endpoint, body, etag, last_modified):
+    if http_cache_db is None:
+        return
+    try:
+        await http_cache_db.execute(
+            'INSERT OR REPLACE INTO responses (endpoint, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)',
+            (endpoint, body, etag, last_modified, time.time())
+        )
+        await http_cache_db.commit()
+    except Exception as e:
+        print(f"Could not persist response for {endpoint}: {str(e)}")
+
+async def touch_persisted_response(endpoint):
+    if http_cache_db is None:
+        return
+    try:
+        await http_cache_db.execute('UPDATE responses SET fetched_at = ? WHERE endpoint = ?', (time.time(), endpoint))
+        await http_cache_db.commit()
+    except Exception as e:
+        print(f"Could not update persisted response for {endpoint}: {str(e)}")
+
+# Persisted entry records of one kind for an entry: {event: parsed record}
+async def load_entry_records(entry_id, kind, event=None):
+    if http_cache_db is None:
+        return {}
+    query = 'SELECT event, body FROM entry_records WHERE entry_id = ? AND kind = ?'
+    params = (entry_id, kind)
+    if event is not None:
+        query += ' AND event = ?'
+        params += (event,)
+    async with http_cache_db.execute(query, params) as cursor:
+        return {event: json.loads(body) async for event, body in cursor}
+
+async def save_entry_records(entry_id, kind, records):
+    if http_cache_db is None or not records:
+        return
+    try:
+        await http_cache_db.executemany(
+            'INSERT OR REPLACE INTO entry_records (entry_id, kind, event, body) VALUES (?, ?, ?, ?)',
+            [(entry_id, kind, event, json.dumps(record)) for event, record in records.items()]
+        )
+        await http_cache_db.commit()
+    except Exception as e:
+        print(f"Could not persist {kind} records for entry {entry_id}: {str(e)}")
+
+# Download an endpoint and store it in the cache if it has a TTL. Cached endpoints are
+# fetched conditionally, so unchanged data costs a 304 instead of a full download.
+async def download_fpl_data(endpoint):
+    ttl = get_cache_ttl(endpoint)
+    if ttl <= 0:
+        status, body, headers = await request_fpl_data(endpoint)
+        return json.loads(body)
+
+    cached = fpl_cache.get(endpoint)
+    if cached is None:
+        cached = await load_persisted_response(endpoint)
+        # A response persisted before a restart may still be fresh enough to use as-is
+        if cached is not None and time.monotonic() - cached['fetched_at'] < ttl:
+            fpl_cache[endpoint] = cached
+            return cached['data']
+
+    request_headers = {}
+    if cached is not None:
+        if cached.get('etag'):
+            request_headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            request_headers['If-Modified-Since'] = cached['last_modified']
+
+    status, body, headers = await request_fpl_data(endpoint, request_headers)
+    if status == 304 and cached is not None:
+        cached['fetched_at'] = time.monotonic()
+        fpl_cache[endpoint] = cached
+        await touch_persisted_response(endpoint)
+        return cached['data']
+
+    etag = headers.get('ETag')
+    last_modified = headers.get('Last-Modified')
+    data = json.loads(body)
+    fpl_cache[endpoint] = make_cache_entry(body, data, etag, last_modified, time.monotonic())
+    await persist_response(endpoint, body, etag, last_modified)
+    return data
+
+async def refresh_fpl_data(endpoint):
+    try:
+        await single_flight(fpl_inflight, endpoint, lambda: download_fpl_data(endpoint))
+    except Exception as e:
+        print(f"Background refresh of {endpoint} failed: {str(e)}")
+
+# Function to fetch data from the FPL API. Cached data is shared between all callers,
+# so treat the returned object as read-only. Expired data may be returned while a refresh
+# runs or when the API is failing; use get_data_age/stale_data_note to tell users.
 async def fetch_fpl_data(endpoint):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{FPL_API_BASE}{endpoint}") as response:
-            return await response.json()
-        
+    cached = fpl_cache.get(endpoint)
+    if cached:
+        ttl = get_cache_ttl(endpoint)
+        age = time.monotonic() - cached['fetched_at']
+        if age < ttl + FPL_STALE_WHILE_REVALIDATE:
+            if age > ttl * FPL_REFRESH_AHEAD and endpoint not in fpl_inflight:
+                spawn_background(refresh_fpl_data(endpoint))
+            return cached['data']
+
+    try:
+        return await single_flight(fpl_inflight, endpoint, lambda: download_fpl_data(endpoint))
+    except Exception as e:
+        # Fall back to whatever we have, however old, rather than failing the command
+        cached = fpl_cache.get(endpoint)
+        if cached is None:
+            raise
+        print(f"Serving stale {endpoint} after fetch failed: {str(e)}")
+        return cached['data']
+
+# Seconds since an endpoint was last fetched or revalidated, or None if it isn't cached
+def get_data_age(endpoint):
+    cached = fpl_cache.get(endpoint)
+    return time.monotonic() - cached['fetched_at'] if cached else None
+
+def format_age(seconds):
+    if seconds < 120:
+        return f"{int(seconds)} seconds"
+    if seconds < 7200:
+        return f"{int(seconds // 60)} minutes"
+    return f"{int(seconds // 3600)} hours"
+
+# Message suffix for commands that may have been served expired data, or "" if all is fresh
+def stale_data_note(*endpoints):
+    stale_ages = []
+    for endpoint in endpoints:
+        age = get_data_age(endpoint)
+        if age is not None and age > get_cache_ttl(endpoint):
+            stale_ages.append(age)
+    if not stale_ages:
+        return ""
+    return f"\n*Showing cached FPL data from {format_age(max(stale_ages))} ago; fresh data is on its way.*"
+
+# Hash of the cached body for an endpoint, used to tell when derived data needs rebuilding
+def get_data_version(endpoint):
+    cached = fpl_cache.get(endpoint)
+    return cached['version'] if cached else None
+
 async def fetch_standings_data():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{FPL_API_BASE}bootstrap-static/") as resp:
-            data = await resp.json()
+    data = await fetch_fpl_data("bootstrap-static/")
     
     teams = data['teams']
     
@@ -96,49 +548,372 @@ async def fetch_standings_data():
     
     return sorted_teams
 
-def fetch_current_standings():
-    url = "http://api.football-data.org/v4/competitions/PL/standings"
-    headers = {"X-Auth-Token": FOOTBALL_DATA_API_KEY}
-    
-    response = requests.get(url, headers=headers)
-    data = response.json()
+# Base URL for the Football-Data.org API
+FOOTBALL_DATA_API_BASE = "http://api.football-data.org/v4/"
+FOOTBALL_DATA_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=5)
+
+# Cache lifetimes in seconds for Football-Data.org endpoints. Standings also stay cached past
+# their TTL until a PL match has finished since they were fetched (see standings_need_refresh).
+FOOTBALL_DATA_STANDINGS = "competitions/PL/standings"
+FOOTBALL_DATA_CACHE_TTL = {
+    FOOTBALL_DATA_STANDINGS: 600,
+    "competitions/PL/teams": 86400,
+}
+STANDINGS_MAX_AGE = 86400  # Refetch standings at least daily, to pick up corrections
+# Time from kickoff until a match is over and reflected in the standings
+MATCH_DURATION = timedelta(minutes=120)
+
+# Cached Football-Data.org responses: endpoint -> {'data': parsed JSON, 'fetched_at': monotonic time,
+# 'fetched_at_wall': epoch time, 'version': body hash}
+football_data_cache = {}
+football_data_inflight = {}
+
+# The free plan allows 10 requests a minute. The API reports what's left in response headers;
+# requests that could be answered from the cache leave FOOTBALL_DATA_BUDGET_RESERVE spare.
+FOOTBALL_DATA_BUDGET_RESERVE = 2
+football_data_budget = {'available': None, 'reset_at': 0.0}
+# Serializes requests so the budget from one response is known before the next is sent
+football_data_budget_lock = asyncio.Lock()
+
+class FootballDataBudgetExhausted(Exception):
+    pass
+
+def update_football_data_budget(headers, status):
+    available = headers.get('X-Requests-Available-Minute', '')
+    reset = headers.get('X-RequestCounter-Reset', '')
+    if available.isdigit():
+        football_data_budget['available'] = int(available)
+    if status == 429:
+        football_data_budget['available'] = 0
+    if reset.isdigit():
+        football_data_budget['reset_at'] = time.monotonic() + int(reset)
+    elif status == 429:
+        football_data_budget['reset_at'] = time.monotonic() + 60
+
+# Seconds until a request fits in the budget while leaving `reserve` requests unused
+def football_data_budget_wait(reserve):
+    available = football_data_budget['available']
+    wait = football_data_budget['reset_at'] - time.monotonic()
+    if available is None or wait <= 0 or available > reserve:
+        return 0
+    return wait
+
+async def download_football_data(endpoint, has_fallback=False):
+    headers = {"X-Auth-Token": FOOTBALL_DATA_API_KEY} if FOOTBALL_DATA_API_KEY else {}
+    url = f"{FOOTBALL_DATA_API_BASE}{endpoint}"
+    check_circuit(url)
+    session = get_http_session()
+    async with football_data_budget_lock:
+        wait = football_data_budget_wait(FOOTBALL_DATA_BUDGET_RESERVE if has_fallback else 0)
+        if wait > 0:
+            if has_fallback:
+                raise FootballDataBudgetExhausted(f"Football-Data.org request budget used up for the next {wait:.0f}s")
+            # Nothing cached to fall back on, so queue until the budget resets
+            print(f"Football-Data.org request budget used up, waiting {wait:.0f}s for {endpoint}")
+            await asyncio.sleep(wait)
+        if football_data_budget['available']:
+            football_data_budget['available'] -= 1
+
+        try:
+            async with session.get(url, headers=headers, timeout=FOOTBALL_DATA_TIMEOUT) as response:
+                update_football_data_budget(response.headers, response.status)
+                if response.status == 429 or response.status >= 500:
+                    record_request_failure(url)
+                else:
+                    record_request_success(url)
+                if response.status != 200:
+                    raise Exception(f"Football-Data.org request for {endpoint} failed with status {response.status}")
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            record_request_failure(url)
+            raise
+
+    data = json.loads(body)
+    football_data_cache[endpoint] = {
+        'data': data,
+        'fetched_at': time.monotonic(),
+        'fetched_at_wall': time.time(),
+        'version': hashlib.sha1(body).hexdigest()[:16]
+    }
+    return data
+
+# Standings only change when matches finish, so they are kept until a PL match has ended
+# after they were fetched. Falls back to the TTL until the fixtures have been loaded.
+def standings_need_refresh(cached):
+    age = time.time() - cached['fetched_at_wall']
+    if age > STANDINGS_MAX_AGE:
+        return True
+    if fixture_store is None:
+        return age > FOOTBALL_DATA_CACHE_TTL[FOOTBALL_DATA_STANDINGS]
+    last_finish = get_last_match_finish(fixture_store, datetime.now(timezone.utc))
+    return last_finish is not None and last_finish.timestamp() > cached['fetched_at_wall']
+
+def football_data_is_fresh(endpoint, cached):
+    if endpoint == FOOTBALL_DATA_STANDINGS:
+        return not standings_need_refresh(cached)
+    return time.monotonic() - cached['fetched_at'] < FOOTBALL_DATA_CACHE_TTL.get(endpoint, 0)
+
+# Function to fetch data from the Football-Data.org API, served from the cache while it is fresh.
+# If the API fails or the request budget is used up, the last cached response is returned instead.
+async def fetch_football_data(endpoint):
+    cached = football_data_cache.get(endpoint)
+    if cached and football_data_is_fresh(endpoint, cached):
+        return cached['data']
+
+    try:
+        return await single_flight(football_data_inflight, endpoint, lambda: download_football_data(endpoint, cached is not None))
+    except Exception as e:
+        if cached is None:
+            raise
+        print(f"Serving stale {endpoint} after fetch failed: {str(e)}")
+        return cached['data']
+
+def get_football_data_version(endpoint):
+    cached = football_data_cache.get(endpoint)
+    return cached['version'] if cached else None
+
+async def fetch_current_standings():
+    data = await fetch_football_data(FOOTBALL_DATA_STANDINGS)
     
     print("Structure of standings data:")
     print(json.dumps(data['standings'][0]['table'][0], indent=2))
     
     return data['standings'][0]['table']
 
+# Image rendering runs in a worker pool so Pillow never blocks the event loop.
+# FPL_BOT_RENDER_EXECUTOR picks "thread" (default) or "process" workers.
+RENDER_EXECUTOR = os.getenv('FPL_BOT_RENDER_EXECUTOR', 'thread').lower()
+RENDER_WORKERS = int(os.getenv('FPL_BOT_RENDER_WORKERS', '2'))
+RENDER_QUEUE_LIMIT = int(os.getenv('FPL_BOT_RENDER_QUEUE_LIMIT', '8'))  # Renders running or queued at once
+RENDER_QUEUE_TIMEOUT = 30  # Seconds to wait for a free slot before giving up
+
+render_executor = None
+render_slots = None
+
+def get_render_executor():
+    global render_executor, render_slots
+    if render_executor is None:
+        if RENDER_EXECUTOR == 'process':
+            render_executor = concurrent.futures.ProcessPoolExecutor(max_workers=RENDER_WORKERS)
+        else:
+            render_executor = concurrent.futures.ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix='render')
+        render_slots = asyncio.Semaphore(RENDER_QUEUE_LIMIT)
+    return render_executor
+
+def shutdown_render_executor():
+    global render_executor, render_slots
+    if render_executor is not None:
+        render_executor.shutdown(wait=False, cancel_futures=True)
+    render_executor = None
+    render_slots = None
+
+# Run a render function in the worker pool. Once RENDER_QUEUE_LIMIT renders are pending,
+# callers wait for a slot (without blocking the loop) and fail if none frees up in time.
+async def run_render(func, *args):
+    executor = get_render_executor()
+    slots = render_slots
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=RENDER_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise Exception("The image renderer is busy right now. Please try again in a moment.")
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    finally:
+        slots.release()
+
+# Fonts for the renderers, loaded once per face and size and shared by every render. Each
+# face tries an FPL_BOT_FONT/FPL_BOT_BOLD_FONT override, then Arial, then common Linux
+# equivalents; if none is installed, Pillow's bundled default font is used instead.
+FONT_FILES = {
+    'regular': [os.getenv('FPL_BOT_FONT'), 'arial.ttf', 'Arial.ttf', 'LiberationSans-Regular.ttf', 'DejaVuSans.ttf'],
+    'bold': [os.getenv('FPL_BOT_BOLD_FONT'), 'arialbd.ttf', 'Arial Bold.ttf', 'LiberationSans-Bold.ttf', 'DejaVuSans-Bold.ttf'],
+    'default': [],
+}
+
+@functools.lru_cache(maxsize=None)
+def get_font(face, size):
+    from PIL import ImageFont
+    for font_file in FONT_FILES[face]:
+        if not font_file:
+            continue
+        try:
+            return ImageFont.truetype(font_file, size)
+        except OSError:
+            continue
+    if face != 'default':
+        print(f"No {face} font found, using Pillow's default font")
+    return ImageFont.load_default(size=size)
+
+# Width in pixels of text drawn in the given font, memoized since the same labels repeat every render
+@functools.lru_cache(maxsize=4096)
+def get_text_width(text, face, size):
+    return get_font(face, size).getlength(text)
+
+# Cache of encoded images keyed by a hash of the request parameters and data versions,
+# evicted least-recently-used first once either limit is exceeded
+RENDER_CACHE_MAX_ENTRIES = 64
+RENDER_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+render_cache = OrderedDict()
+render_cache_bytes = 0
+
+# Build a cache key from the request parameters; returns None if any data version is unknown
+def make_render_key(command, params, data_versions):
+    if any(version is None for version in data_versions):
+        return None
+    key_source = json.dumps([command, params, data_versions], sort_keys=True, default=str)
+    return hashlib.sha1(key_source.encode()).hexdigest()
+
+def get_cached_render(key):
+    if key is None or key not in render_cache:
+        return None
+    render_cache.move_to_end(key)
+    return render_cache[key]
+
+def store_render(key, image_bytes):
+    global render_cache_bytes
+    if key is None or len(image_bytes) > RENDER_CACHE_MAX_BYTES:
+        return
+    if key in render_cache:
+        render_cache_bytes -= len(render_cache.pop(key))
+    render_cache[key] = image_bytes
+    render_cache_bytes += len(image_bytes)
+    while len(render_cache) > RENDER_CACHE_MAX_ENTRIES or render_cache_bytes > RENDER_CACHE_MAX_BYTES:
+        _, evicted = render_cache.popitem(last=False)
+        render_cache_bytes -= len(evicted)
+
+# Output encodings for rendered images. The images only use a few flat colours plus
+# anti-aliased text, so "palette" (256-colour PNG) is about half the size of "png" (full RGB)
+# and quicker to encode; "webp" (lossless) is smaller still but slower.
+# benchmarks/encode_benchmark.py compares them.
+IMAGE_ENCODINGS = {
+    'png': {'format': 'PNG', 'extension': 'png', 'palette': False, 'options': {'compress_level': 6}},
+    'palette': {'format': 'PNG', 'extension': 'png', 'palette': True, 'options': {'compress_level': 6}},
+    'webp': {'format': 'WEBP', 'extension': 'webp', 'palette': False, 'options': {'lossless': True, 'method': 4}},
+}
+
+# Encoding used by each command: FPL_BOT_<COMMAND>_IMAGE_FORMAT, else FPL_BOT_IMAGE_FORMAT, else palette
+DEFAULT_IMAGE_ENCODING = os.getenv('FPL_BOT_IMAGE_FORMAT', 'palette').lower()
+
+def get_image_encoding(command):
+    encoding = os.getenv(f'FPL_BOT_{command.upper()}_IMAGE_FORMAT', DEFAULT_IMAGE_ENCODING).lower()
+    if encoding not in IMAGE_ENCODINGS:
+        print(f"Unknown image format '{encoding}' for {command}, using png")
+        return 'png'
+    return encoding
+
+def encode_image(image, encoding='png'):
+    from PIL import Image
+    settings = IMAGE_ENCODINGS[encoding]
+    if settings['palette']:
+        image = image.quantize(colors=256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+    img_byte_arr = io.BytesIO()
+    image.save(img_byte_arr, format=settings['format'], **settings['options'])
+    return img_byte_arr.getvalue()
+
+def image_filename(name, encoding):
+    return f"{name}.{IMAGE_ENCODINGS[encoding]['extension']}"
+
+# Discord CDN URLs of images the bot has already uploaded, keyed by a hash of the image bytes.
+# An identical image is sent again as an embed pointing at the first upload instead of being
+# re-uploaded. Attachment URLs are signed and expire (the "ex" query parameter), so entries
+# are dropped a little before that, or after ATTACHMENT_URL_TTL if the URL has no expiry.
+ATTACHMENT_URL_TTL = 12 * 3600
+ATTACHMENT_URL_EXPIRY_MARGIN = 600
+ATTACHMENT_URL_CACHE_MAX_ENTRIES = 256
+
+attachment_urls = OrderedDict()  # image hash -> {'url', 'expires'}
+
+def get_attachment_url_expiry(url):
+    expires = time.time() + ATTACHMENT_URL_TTL
+    signed_expiry = urllib.parse.parse_qs(urllib.parse.urlparse(url).query).get('ex')
+    if signed_expiry:
+        try:
+            expires = min(expires, int(signed_expiry[0], 16) - ATTACHMENT_URL_EXPIRY_MARGIN)
+        except ValueError:
+            pass
+    return expires
+
+def get_attachment_url(image_hash):
+    cached = attachment_urls.get(image_hash)
+    if cached is None:
+        return None
+    if cached['expires'] <= time.time():
+        del attachment_urls[image_hash]
+        return None
+    attachment_urls.move_to_end(image_hash)
+    return cached['url']
+
+def remember_attachment_url(image_hash, url):
+    attachment_urls[image_hash] = {'url': url, 'expires': get_attachment_url_expiry(url)}
+    attachment_urls.move_to_end(image_hash)
+    while len(attachment_urls) > ATTACHMENT_URL_CACHE_MAX_ENTRIES:
+        attachment_urls.popitem(last=False)
+
+# Send an encoded image, reusing an earlier upload of the same bytes when its URL is still valid
+async def send_image(ctx, image_bytes, filename, content=None):
+    image_hash = hashlib.sha1(image_bytes).hexdigest()
+    url = get_attachment_url(image_hash)
+    if url is not None:
+        embed = Embed()
+        embed.set_image(url=url)
+        try:
+            return await ctx.send(content, embed=embed)
+        except discord.HTTPException as e:
+            print(f"Could not reuse uploaded image, uploading again: {str(e)}")
+            attachment_urls.pop(image_hash, None)
+
+    message = await ctx.send(content, file=discord.File(fp=io.BytesIO(image_bytes), filename=filename))
+    if message.attachments:
+        remember_attachment_url(image_hash, message.attachments[0].url)
+    return message
+
+# Render entry points for the worker pool; they return encoded image bytes, which are cheap to pass between processes
+def render_table(teams, encoding):
+    return encode_image(create_table_image(teams), encoding)
+
+def render_fixture_grid(encoding, *args):
+    return encode_image(create_fixture_grid(*args), encoding)
+
+def render_leaderboard(standings, encoding):
+    return encode_image(create_leaderboard_image(standings), encoding)
+
 # Command to display the league table
 @bot.command()
 async def table(ctx):
     try:
-        standings_data = await fetch_standings_data()
-        
-        # Sort teams by position
-        sorted_teams = sorted(standings_data, key=lambda x: x['position'])
-        
-        # Create the table image
-        image = create_table_image(sorted_teams)
-        
-        # Convert image to bytes
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='PNG')
-        img_byte_arr.seek(0)
+        encoding = get_image_encoding("table")
+        image_bytes = await coalesce_command("table", [], lambda: build_table_image(encoding))
         
         # Send the image
-        await ctx.send(file=discord.File(fp=img_byte_arr, filename='table.png'))
+        await send_image(ctx, image_bytes, image_filename('table', encoding), stale_data_note("bootstrap-static/").strip() or None)
     except Exception as e:
         await ctx.send(f"An error occurred: {str(e)}")
         print(f"Full error: {e}")  # This will print the full error to your console
 
+# Build the league table image, reusing the last render if the data hasn't changed
+async def build_table_image(encoding):
+    standings_data = await fetch_standings_data()
+    
+    # Sort teams by position
+    sorted_teams = sorted(standings_data, key=lambda x: x['position'])
+    
+    render_key = make_render_key("table", {'encoding': encoding}, [get_data_version("bootstrap-static/")])
+    image_bytes = get_cached_render(render_key)
+    if image_bytes is None:
+        image_bytes = await run_render(render_table, sorted_teams, encoding)
+        store_render(render_key, image_bytes)
+    return image_bytes
+
 # Function to create the table image
 def create_table_image(teams):
+    from PIL import Image, ImageDraw
     # Define image properties
     width = 1000
     height = 50 + len(teams) * 30
     padding = 10
-    font = ImageFont.truetype("arial.ttf", 16)
-    header_font = ImageFont.truetype("arialbd.ttf", 16)
+    font = get_font('regular', 16)
+    header_font = get_font('bold', 16)
 
     # Create image and drawing context
     image = Image.new('RGB', (width, height), color='white')
@@ -191,31 +966,281 @@ def create_table_image(teams):
 
     return image
 
-# Database setup
-async def setup_database():
-    async with aiosqlite.connect('fpl_users.db') as db:
-        # Create users table
-        await db.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                discord_id INTEGER PRIMARY KEY,
-                fpl_id INTEGER,
-                team_name TEXT
-            )
-        ''')
-        # Create leagues table
-        await db.execute('''
-            CREATE TABLE IF NOT EXISTS leagues (
-                guild_id INTEGER PRIMARY KEY,
-                league_id INTEGER
-            )
-        ''')
-        await db.commit()
+# Database setup. One connection is opened in setup_hook and kept for the bot's lifetime, so
+# sqlite's per-connection statement cache reuses the prepared queries below.
+DATABASE_PATH = 'fpl_users.db'
+DB_COMMIT_DELAY = 0.5  # Seconds to wait for more writes before committing them together
+
+user_db = None
+db_commit_task = None
+
+# Read caches in front of the users and leagues tables. A cached None means "no row";
+# writes update the cache after hitting the database.
+linked_teams_cache = {}  # discord_id -> (fpl_id, team_name) or None
+guild_leagues_cache = {}  # guild_id -> league_id or None
+
+# Schema migrations, applied in order. The database's PRAGMA user_version records the last
+# one applied, so each runs exactly once. Add new migrations to the end; never edit old ones.
+DATABASE_MIGRATIONS = [
+    # 1: users and each guild's league
+    (1, [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            discord_id INTEGER PRIMARY KEY,
+            fpl_id INTEGER,
+            team_name TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS leagues (
+            guild_id INTEGER PRIMARY KEY,
+            league_id INTEGER
+        )
+        ''',
+    ]),
+    # 2: reverse lookups by FPL ID, and any number of leagues per guild. The leagues table
+    # stays as each guild's default league for !leaderboard.
+    (2, [
+        'CREATE INDEX IF NOT EXISTS idx_users_fpl_id ON users (fpl_id)',
+        '''
+        CREATE TABLE IF NOT EXISTS guild_leagues (
+            guild_id INTEGER NOT NULL,
+            league_id INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, league_id)
+        ) WITHOUT ROWID
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_guild_leagues_league_id ON guild_leagues (league_id)',
+        'INSERT OR IGNORE INTO guild_leagues (guild_id, league_id) SELECT guild_id, league_id FROM leagues WHERE league_id IS NOT NULL',
+    ]),
+]
+
+async def migrate_database(db):
+    async with db.execute('PRAGMA user_version') as cursor:
+        (current_version,) = await cursor.fetchone()
+    for version, statements in DATABASE_MIGRATIONS:
+        if version <= current_version:
+            continue
+        # Each migration and its version bump commit together, or not at all
+        await db.execute('BEGIN')
+        try:
+            for statement in statements:
+                await db.execute(statement)
+            await db.execute(f'PRAGMA user_version = {version}')
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        print(f"Migrated database to version {version}")
+
+async def open_database():
+    global user_db
+    if user_db is not None:
+        return
+    user_db = await aiosqlite.connect(DATABASE_PATH)
+    # WAL lets reads proceed during writes; NORMAL sync is safe with WAL and avoids an fsync per commit
+    await user_db.execute('PRAGMA journal_mode=WAL')
+    await user_db.execute('PRAGMA synchronous=NORMAL')
+    await user_db.execute('PRAGMA temp_store=MEMORY')
+    await user_db.execute('PRAGMA cache_size=-8000')  # 8 MB page cache
+    await user_db.execute('PRAGMA busy_timeout=5000')
+    await migrate_database(user_db)
+
+async def close_database():
+    global user_db
+    if user_db is None:
+        return
+    if db_commit_task is not None and not db_commit_task.done():
+        db_commit_task.cancel()
+    await user_db.commit()
+    await user_db.close()
+    user_db = None
+
+async def commit_soon():
+    await asyncio.sleep(DB_COMMIT_DELAY)
+    try:
+        await user_db.commit()
+    except Exception as e:
+        print(f"Database commit failed: {str(e)}")
+
+# Commit shortly after a write, so a burst of writes shares one commit
+def schedule_commit():
+    global db_commit_task
+    if db_commit_task is None or db_commit_task.done():
+        db_commit_task = spawn_background(commit_soon())
+
+async def get_linked_team(discord_id):
+    if discord_id not in linked_teams_cache:
+        async with user_db.execute('SELECT fpl_id, team_name FROM users WHERE discord_id = ?', (discord_id,)) as cursor:
+            linked_teams_cache[discord_id] = await cursor.fetchone()
+    return linked_teams_cache[discord_id]
+
+async def set_linked_team(discord_id, fpl_id, team_name):
+    await user_db.execute('''
+        INSERT OR REPLACE INTO users (discord_id, fpl_id, team_name)
+        VALUES (?, ?, ?)
+    ''', (discord_id, fpl_id, team_name))
+    linked_teams_cache[discord_id] = (fpl_id, team_name)
+    schedule_commit()
+
+async def get_guild_league(guild_id):
+    if guild_id not in guild_leagues_cache:
+        async with user_db.execute('SELECT league_id FROM leagues WHERE guild_id = ?', (guild_id,)) as cursor:
+            row = await cursor.fetchone()
+        guild_leagues_cache[guild_id] = row[0] if row else None
+    return guild_leagues_cache[guild_id]
+
+# Make a league the guild's default, and add it to the guild's leagues
+async def set_guild_league(guild_id, league_id):
+    await user_db.execute('INSERT OR REPLACE INTO leagues (guild_id, league_id) VALUES (?, ?)', (guild_id, league_id))
+    await user_db.execute('INSERT OR IGNORE INTO guild_leagues (guild_id, league_id) VALUES (?, ?)', (guild_id, league_id))
+    guild_leagues_cache[guild_id] = league_id
+    schedule_commit()
+
+async def get_all_guild_leagues(guild_id):
+    async with user_db.execute('SELECT league_id FROM guild_leagues WHERE guild_id = ? ORDER BY league_id', (guild_id,)) as cursor:
+        return [row[0] for row in await cursor.fetchall()]
+
+# Remove a league from the guild. If it was the default, the guild's lowest remaining league
+# becomes the default. Returns whether the league was registered, and the guild's default
+# league afterwards (None if none is left).
+async def remove_guild_league(guild_id, league_id):
+    async with user_db.execute('DELETE FROM guild_leagues WHERE guild_id = ? AND league_id = ?', (guild_id, league_id)) as cursor:
+        removed = cursor.rowcount > 0
+    default_league = await get_guild_league(guild_id)
+    if not removed:
+        return False, default_league
+    if default_league == league_id:
+        async with user_db.execute('SELECT MIN(league_id) FROM guild_leagues WHERE guild_id = ?', (guild_id,)) as cursor:
+            (default_league,) = await cursor.fetchone()
+        if default_league is None:
+            await user_db.execute('DELETE FROM leagues WHERE guild_id = ?', (guild_id,))
+        else:
+            await user_db.execute('INSERT OR REPLACE INTO leagues (guild_id, league_id) VALUES (?, ?)', (guild_id, default_league))
+        guild_leagues_cache[guild_id] = default_league
+    schedule_commit()
+    return True, default_league
+
+# Every league registered in any guild
+async def get_registered_leagues():
+    async with user_db.execute('SELECT DISTINCT league_id FROM guild_leagues') as cursor:
+        return [row[0] for row in await cursor.fetchall()]
+
+# Background prefetch scheduler: wakes just after each deadline, kickoff and final whistle
+# (and every PREFETCH_MATCH_INTERVAL while a match is on) to refresh the data those moments
+# change, so the first command afterwards is served from the cache instead of waiting on the API
+PREFETCH_MATCH_INTERVAL = 120
+PREFETCH_IDLE_INTERVAL = 6 * 3600  # Longest sleep when nothing is coming up
+PREFETCH_EVENT_DELAY = 60  # Give the APIs a moment to update after each moment
+PREFETCH_MIN_INTERVAL = 30
+
+# Seconds until the scheduler should next wake
+async def get_prefetch_delay(now):
+    fixtures, bootstrap = await asyncio.gather(
+        fetch_fpl_data("fixtures/"),
+        fetch_fpl_data("bootstrap-static/")
+    )
+    store = get_fixture_store(fixtures)
+    next_finish = get_next_match_finish(store, now)
+    if next_finish is not None and next_finish - MATCH_DURATION <= now:
+        return PREFETCH_MATCH_INTERVAL
+
+    upcoming = get_upcoming_fixtures(store, now)
+    moments = [
+        get_next_deadline(bootstrap, now),
+        store['kickoffs'][upcoming[0]['id']] if upcoming else None,
+        next_finish
+    ]
+    delay = PREFETCH_IDLE_INTERVAL
+    for moment in moments:
+        if moment is not None:
+            delay = min(delay, (moment - now).total_seconds() + PREFETCH_EVENT_DELAY)
+    return delay
+
+async def prefetch():
+    for endpoint in ("bootstrap-static/", "fixtures/"):
+        await refresh_fpl_data(endpoint)
+    try:
+        state, _ = await get_standings_expiry(datetime.now(timezone.utc))
+    except Exception as e:
+        print(f"Could not work out the gameweek state: {str(e)}")
+        state = "live"
+    # Only spends a Football-Data.org request if a match has finished since the last fetch
+    try:
+        await fetch_football_data(FOOTBALL_DATA_STANDINGS)
+    except Exception as e:
+        print(f"Standings prefetch failed: {str(e)}")
+
+    # The first leaderboard page of every registered league. Member values and overall ranks are
+    # left alone during matches, when they would expire again before anyone asked for them.
+    try:
+        league_ids = await get_registered_leagues()
+    except Exception as e:
+        print(f"Could not list registered leagues: {str(e)}")
+        league_ids = []
+    for league_id in league_ids:
+        try:
+            league_data = await fetch_league_page(league_id, 1)
+            if state != "live":
+                await fan_out(fetch_team_data, [dict(entry) for entry in league_data['standings']['results']])
+        except Exception as e:
+            print(f"Prefetch of league {league_id} failed: {str(e)}")
+
+async def prefetch_scheduler():
+    while True:
+        try:
+            delay = await get_prefetch_delay(datetime.now(timezone.utc))
+        except Exception as e:
+            print(f"Could not schedule the next prefetch: {str(e)}")
+            delay = PREFETCH_MATCH_INTERVAL
+        delay = max(delay, PREFETCH_MIN_INTERVAL)
+        if DEBUG:
+            print(f"Next prefetch in {delay:.0f}s")
+        await asyncio.sleep(delay)
+        start = time.perf_counter()
+        await prefetch()
+        if DEBUG:
+            print(f"Prefetch finished in {time.perf_counter() - start:.2f}s")
+
+# Endpoints loaded into the cache as soon as the bot connects
+WARM_UP_ENDPOINTS = ["bootstrap-static/", "fixtures/"]
+warm_up_task = None
+
+# Background warm-up after connecting: seed the in-memory cache from the on-disk snapshots,
+# then refresh from the network and start the periodic background tasks
+async def warm_up():
+    global current_pl_teams
+    start = time.perf_counter()
+    for endpoint in WARM_UP_ENDPOINTS:
+        if endpoint not in fpl_cache:
+            try:
+                cached = await load_persisted_response(endpoint)
+            except Exception as e:
+                print(f"Could not load cached {endpoint}: {str(e)}")
+                cached = None
+            if cached is not None:
+                fpl_cache[endpoint] = cached
+
+    for endpoint in WARM_UP_ENDPOINTS:
+        try:
+            await fetch_fpl_data(endpoint)
+        except Exception as e:
+            print(f"Warm-up fetch of {endpoint} failed: {str(e)}")
+
+    spawn_background(prefetch_scheduler())
+    try:
+        current_pl_teams = await load_pl_teams()
+    except Exception as e:
+        print(f"Could not refresh PL team names: {str(e)}")
+    print(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
 
 @bot.event
 async def on_ready():
+    global warm_up_task
     print(f'{bot.user} has connected to Discord!')
     print(f'Bot is in {len(bot.guilds)} guilds')
-    await setup_database()
+    # on_ready fires again after reconnects; only warm up once
+    if warm_up_task is None:
+        warm_up_task = spawn_background(warm_up())
 
 # Command to say hello
 @bot.command()
@@ -233,7 +1258,7 @@ async def gameweek(ctx):
         current_gameweek = next(gw for gw in data['events'] if gw['is_current'])
         
         # Parse and format the deadline time
-        deadline_time = datetime.strptime(current_gameweek['deadline_time'], "%Y-%m-%dT%H:%M:%SZ")
+        deadline_time = parse_fpl_time(current_gameweek['deadline_time'])
         formatted_deadline = deadline_time.strftime("%A, %d %B %Y at %H:%M UTC")
         
         # Construct the response message
@@ -241,10 +1266,115 @@ async def gameweek(ctx):
         response += f"Deadline: {formatted_deadline}\n"
         response += f"Average Score: {current_gameweek['average_entry_score']}"
         
-        await ctx.send(response)
+        await ctx.send(response + stale_data_note("bootstrap-static/"))
     except Exception as e:
         await ctx.send(f"An error occurred: {str(e)}")
 
+# Letters that don't decompose into an ASCII base letter under NFKD
+SPECIAL_LETTERS = str.maketrans({'ø': 'o', 'æ': 'ae', 'œ': 'oe', 'ß': 'ss', 'đ': 'd', 'ł': 'l', 'ı': 'i', 'þ': 'th'})
+
+# Lower-case, accent-fold and tidy a name so "Ødegaard", "odegaard" and "ØDEGAARD" compare equal
+@functools.lru_cache(maxsize=4096)
+def normalize_name(name):
+    name = name.lower().translate(SPECIAL_LETTERS)
+    name = ''.join(c for c in unicodedata.normalize('NFKD', name) if not unicodedata.combining(c))
+    return ' '.join(name.replace('-', ' ').replace('.', ' ').replace("'", '').split())
+
+# Minimum fuzzy match score (0-100) for a player name that matches nothing exactly
+PLAYER_MATCH_THRESHOLD = 70
+
+# Search index over bootstrap-static elements, rebuilt when the bootstrap data version changes
+player_index = None
+
+def build_player_index(data, version):
+    by_id = {p['id']: p for p in data['elements']}
+    by_team = defaultdict(list)
+    by_name = defaultdict(list)
+    # Prefix trie over name tokens; every node holds the ids of players with a token through it
+    trie = {}
+    names = []
+    name_ids = []
+
+    # Players are indexed in descending total_points order, so the first hit is always the top scorer
+    for player in sorted(data['elements'], key=lambda x: x['total_points'], reverse=True):
+        player_id = player['id']
+        by_team[player['team']].append(player_id)
+
+        full_name = normalize_name(f"{player['first_name']} {player['second_name']}")
+        web_name = normalize_name(player['web_name'])
+        for name in {full_name, web_name}:
+            by_name[name].append(player_id)
+            names.append(name)
+            name_ids.append(player_id)
+            for token in name.split():
+                node = trie
+                for char in token:
+                    node = node.setdefault(char, {'ids': []})
+                    if player_id not in node['ids']:
+                        node['ids'].append(player_id)
+
+    return {
+        'version': version,
+        'by_id': by_id,
+        'by_team': dict(by_team),
+        'by_name': dict(by_name),
+        'trie': trie,
+        'names': names,
+        'name_ids': name_ids,
+        'teams': {t['id']: t for t in data['teams']}
+    }
+
+def get_player_index(data):
+    global player_index
+    version = get_data_version("bootstrap-static/")
+    if player_index is None or version is None or player_index['version'] != version:
+        player_index = build_player_index(data, version)
+        print(f"Built player index for {len(player_index['by_id'])} players (data version {version})")
+    return player_index
+
+def trie_prefix_ids(trie, prefix):
+    node = trie
+    for char in prefix:
+        node = node.get(char)
+        if node is None:
+            return []
+    return node['ids']
+
+# Find players matching a search term, best match first: exact name, then every query word
+# prefixing a name word, then substring, then fuzzy. Ties go to the higher scorer.
+def search_players(index, search_term):
+    query = normalize_name(search_term)
+    if not query:
+        return []
+
+    if query in index['by_name']:
+        return [index['by_id'][i] for i in index['by_name'][query]]
+
+    # Intersect the prefix matches for each query word, keeping the points order of the first list
+    tokens = query.split()
+    candidates = trie_prefix_ids(index['trie'], tokens[0])
+    for token in tokens[1:]:
+        token_ids = set(trie_prefix_ids(index['trie'], token))
+        candidates = [i for i in candidates if i in token_ids]
+    if candidates:
+        return [index['by_id'][i] for i in candidates]
+
+    seen = set()
+    substring_matches = []
+    for name, player_id in zip(index['names'], index['name_ids']):
+        if query in name and player_id not in seen:
+            seen.add(player_id)
+            substring_matches.append(index['by_id'][player_id])
+    if substring_matches:
+        return substring_matches
+
+    from rapidfuzz import process as rf_process, fuzz as rf_fuzz
+    match = rf_process.extractOne(query, index['names'], scorer=rf_fuzz.WRatio, processor=None, score_cutoff=PLAYER_MATCH_THRESHOLD)
+    if match:
+        print(f"Fuzzy matched '{search_term}' to '{match[0]}' (score: {match[1]:.0f})")
+        return [index['by_id'][index['name_ids'][match[2]]]]
+    return []
+
 # Command to get player information
 @bot.command()
 async def player(ctx, *, player_name):
@@ -252,38 +1382,20 @@ async def player(ctx, *, player_name):
         # Fetch the bootstrap-static data
         data = await fetch_fpl_data("bootstrap-static/")
         
-        print(f"Number of players in data: {len(data.get('elements', []))}")
-        
         if not data.get('elements'):
             await ctx.send("Error: Unable to fetch player data. Please try again later.")
             return
 
-        # Get all players, sorted by total_points (descending)
-        all_players = sorted(
-            data['elements'],
-            key=lambda x: x['total_points'],
-            reverse=True
-        )
-        
-        print("Top 5 players by total points:")
-        for p in all_players[:5]:
-            print(f"{p['first_name']} {p['second_name']}: {p['total_points']} points")
+        index = get_player_index(data)
+        matching_players = search_players(index, player_name)
         
-        # Custom search function
-        def match_player(search_term, player):
-            full_name = f"{player['first_name']} {player['second_name']}".lower()
-            return search_term.lower() in full_name
-        
-        # Find matching players
-        matching_players = [p for p in all_players if match_player(player_name, p)]
-        
-        print(f"Matching players for '{player_name}': {[f'{p['first_name']} {p['second_name']}' for p in matching_players[:5]]}")
+        print(f"Matching players for '{player_name}': {[p['web_name'] for p in matching_players[:5]]}")
         
         if matching_players:
-            player = matching_players[0]  # Take the highest scoring matching player
+            player = matching_players[0]  # Take the best matching player
             
             # Find the team name for the player
-            team = next(t['name'] for t in data['teams'] if t['id'] == player['team'])
+            team = index['teams'][player['team']]['name']
             
             # Construct the response message
             response = f"Player: {player['first_name']} {player['second_name']} ({team})\n"
@@ -294,7 +1406,7 @@ async def player(ctx, *, player_name):
             if full_name.lower() != player_name.lower():
                 response = f"Showing results for '{full_name}':\n\n" + response
             
-            await ctx.send(response)
+            await ctx.send(response + stale_data_note("bootstrap-static/"))
         else:
             await ctx.send(f"Player '{player_name}' not found. Please try a different name.")
     except Exception as e:
@@ -359,75 +1471,110 @@ async def fixtures(ctx, *, args=""):
     await ctx.send("Generating fixture grid... This may take a moment.")
     
     try:
-        fixture_data, actual_start_gw, actual_gameweeks, team_names, gw_dates, cup_fixture_buckets = await fetch_fixture_data(num_gameweeks, teams, sort_method, start_gw, show_cups)
-        if not fixture_data:
+        # Identical requests made while this one is in progress share its result
+        command_args = [sorted(set(teams)), num_gameweeks, sort_method, start_gw, show_cups]
+        image_bytes = await coalesce_command("fixtures", command_args, lambda: build_fixture_grid(num_gameweeks, teams, sort_method, start_gw, show_cups))
+        if image_bytes is None:
             await ctx.send("No valid teams found. Please check your team names and try again.")
             return
         
-        # Get team positions and points if sort_method is "table"
-        team_positions = {}
-        team_points = {}
-        if sort_method == "table":
-            current_standings = fetch_current_standings()
-            
-            # Create a mapping between Football-Data.org team names and FPL short names
-            team_name_mapping = {format_team_name(v): k for k, v in team_names.items()}
-            
-            for team in current_standings:
-                full_name = format_team_name(team['team']['name'])
-                if full_name in team_name_mapping:
-                    team_short = team_name_mapping[full_name]
-                    team_positions[team_short] = team['position']
-                    team_points[team_short] = team['points']
-                else:
-                    print(f"Warning: No matching FPL team found for {full_name}")
-            
-            # Check for any missing teams
-            missing_teams = set(fixture_data.keys()) - set(team_positions.keys())
-            if missing_teams:
-                print(f"Warning: The following teams are missing from the standings data: {', '.join(missing_teams)}")
-                
-                # Try to match missing teams by their full name
-                for short_name in missing_teams:
-                    full_name = team_names[short_name]
-                    matching_team = next((t for t in current_standings if format_team_name(t['team']['name']) == full_name), None)
-                    if matching_team:
-                        team_positions[short_name] = matching_team['position']
-                        team_points[short_name] = matching_team['points']
-                        print(f"Matched {short_name} to {matching_team['team']['name']}")
-                    else:
-                        print(f"Could not match {short_name} ({full_name}) to any team in the standings")
-            
-            for short_name in fixture_data.keys():
-                print(f"Team: {short_name}, Position: {team_positions.get(short_name, 'N/A')}, Points: {team_points.get(short_name, 'N/A')}")
-        
-        image = create_fixture_grid(fixture_data, actual_gameweeks, actual_start_gw, team_names, gw_dates, sort_method, team_positions, team_points, cup_fixture_buckets)
-        
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='PNG')
-        img_byte_arr.seek(0)
-        
-        await ctx.send(file=discord.File(fp=img_byte_arr, filename='fixtures.png'))
+        await send_image(ctx, image_bytes, image_filename('fixtures', get_image_encoding("fixtures")), stale_data_note("fixtures/", "bootstrap-static/").strip() or None)
     except Exception as e:
         await ctx.send(f"An error occurred: {str(e)}")
         print(f"Full error: {e}")  # This will print the full error to your console
 
+# Build the fixture grid image for a !fixtures request, or None if no teams matched
+async def build_fixture_grid(num_gameweeks, teams, sort_method, start_gw, show_cups):
+    fixture_data, actual_start_gw, actual_gameweeks, team_names, gw_dates, cup_fixture_buckets, season_fixture_data = await fetch_fixture_data(num_gameweeks, teams, sort_method, start_gw, show_cups)
+    if not fixture_data:
+        return None
+    
+    # Requests that resolve to the same teams, order and gameweeks share one cached image
+    encoding = get_image_encoding("fixtures")
+    render_params = {
+        'teams': list(fixture_data.keys()),
+        'start_gw': actual_start_gw,
+        'gameweeks': actual_gameweeks,
+        'sort': sort_method,
+        'cups': show_cups,
+        'encoding': encoding
+    }
+    data_versions = [get_data_version("fixtures/"), get_data_version("bootstrap-static/")]
+    if sort_method == "table":
+        data_versions.append(get_football_data_version(FOOTBALL_DATA_STANDINGS))
+    render_key = make_render_key("fixtures", render_params, data_versions)
+    image_bytes = get_cached_render(render_key)
+    if image_bytes is not None:
+        print(f"Serving cached fixture grid {render_key}")
+        return image_bytes
+    
+    # Get team positions and points if sort_method is "table"
+    team_positions = {}
+    team_points = {}
+    if sort_method == "table":
+        current_standings = await fetch_current_standings()
+        
+        # Create a mapping between Football-Data.org team names and FPL short names
+        team_name_mapping = {format_team_name(v): k for k, v in team_names.items()}
+        
+        for team in current_standings:
+            full_name = format_team_name(team['team']['name'])
+            if full_name in team_name_mapping:
+                team_short = team_name_mapping[full_name]
+                team_positions[team_short] = team['position']
+                team_points[team_short] = team['points']
+            else:
+                print(f"Warning: No matching FPL team found for {full_name}")
+        
+        # Check for any missing teams
+        missing_teams = set(fixture_data.keys()) - set(team_positions.keys())
+        if missing_teams:
+            print(f"Warning: The following teams are missing from the standings data: {', '.join(missing_teams)}")
+            
+            # Try to match missing teams by their full name
+            for short_name in missing_teams:
+                full_name = team_names[short_name]
+                matching_team = next((t for t in current_standings if format_team_name(t['team']['name']) == full_name), None)
+                if matching_team:
+                    team_positions[short_name] = matching_team['position']
+                    team_points[short_name] = matching_team['points']
+                    print(f"Matched {short_name} to {matching_team['team']['name']}")
+                else:
+                    print(f"Could not match {short_name} ({full_name}) to any team in the standings")
+        
+        for short_name in fixture_data.keys():
+            print(f"Team: {short_name}, Position: {team_positions.get(short_name, 'N/A')}, Points: {team_points.get(short_name, 'N/A')}")
+    
+    # Strips of the full season grid are cached per fixtures and bootstrap version
+    strip_version = make_render_key("fixture-strips", {}, [get_data_version("fixtures/"), get_data_version("bootstrap-static/")])
+    image_bytes = await run_render(render_fixture_grid, encoding, fixture_data, actual_gameweeks, actual_start_gw, team_names, gw_dates, sort_method, team_positions, team_points, cup_fixture_buckets, season_fixture_data, strip_version)
+    store_render(render_key, image_bytes)
+    return image_bytes
+
+# Function to read the PL teams snapshot from disk without any network access
+def read_pl_teams_snapshot():
+    try:
+        with open('pl_teams.json', 'r') as f:
+            return json.load(f)['teams']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return []
+
 # Function to load or update the PL teams data
-def load_pl_teams():
+async def load_pl_teams():
     try:
         with open('pl_teams.json', 'r') as f:
             data = json.load(f)
         # Check if the data is older than 3 months
         last_updated = datetime.fromisoformat(data['last_updated'])
         if datetime.now() - last_updated > timedelta(days=90):
-            return update_pl_teams()
+            return await update_pl_teams()
         return data['teams']
     except (FileNotFoundError, json.JSONDecodeError, KeyError):
-        return update_pl_teams()
+        return await update_pl_teams()
 
 # Function to update the PL teams data
-def update_pl_teams():
-    teams = fetch_current_pl_teams()
+async def update_pl_teams():
+    teams = await fetch_current_pl_teams()
     data = {
         'last_updated': datetime.now().isoformat(),
         'teams': teams
@@ -437,12 +1584,8 @@ def update_pl_teams():
     return teams
 
 # Function to fetch the current PL teams data
-def fetch_current_pl_teams():
-    url = "http://api.football-data.org/v4/competitions/PL/teams"
-    headers = {"X-Auth-Token": FOOTBALL_DATA_API_KEY}
-    
-    response = requests.get(url, headers=headers)
-    data = response.json()
+async def fetch_current_pl_teams():
+    data = await fetch_football_data("competitions/PL/teams")
     
     team_names = [team['name'] for team in data['teams']]
     
@@ -452,12 +1595,12 @@ def fetch_current_pl_teams():
     
     return team_names
 
-# Call this function to see the list of team names
-current_pl_teams = fetch_current_pl_teams()
+# PL team names: read from pl_teams.json in setup_hook, then refreshed by warm_up()
+current_pl_teams = []
 
 @bot.command()
 async def show_team_names(ctx):
-    team_names = fetch_current_pl_teams()
+    team_names = await fetch_current_pl_teams()
     message = "Team names from Football-Data.org API:\n" + "\n".join(team_names)
     await ctx.send(message)
 
@@ -487,18 +1630,109 @@ def format_team_name(name):
     }
     return name_mapping.get(name, name)
 
+# Parse an FPL API timestamp such as "2024-08-16T19:00:00Z" into an aware UTC datetime
+@functools.lru_cache(maxsize=2048)
+def parse_fpl_time(value):
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+# Indexes over the fixtures/ payload, rebuilt when the fixtures data version changes
+fixture_store = None
+
+def build_fixture_store(fixtures, version):
+    kickoffs = {}
+    by_event = defaultdict(list)
+    by_team = defaultdict(list)
+    by_team_event = defaultdict(list)
+    scheduled = []
+
+    for fixture in fixtures:
+        kickoff = parse_fpl_time(fixture['kickoff_time']) if fixture.get('kickoff_time') else None
+        kickoffs[fixture['id']] = kickoff
+        # Postponed fixtures have no gameweek or kickoff until they are rescheduled
+        if fixture.get('event') is None or kickoff is None:
+            continue
+        scheduled.append(fixture)
+        by_event[fixture['event']].append(fixture)
+        for team_id in (fixture['team_h'], fixture['team_a']):
+            by_team[team_id].append(fixture)
+            # More than one entry for a (team, event) key is a double gameweek; no entry is a blank
+            by_team_event[(team_id, fixture['event'])].append(fixture)
+
+    def by_kickoff(fixture):
+        return kickoffs[fixture['id']]
+
+    scheduled.sort(key=by_kickoff)
+    for fixture_list in (*by_event.values(), *by_team.values(), *by_team_event.values()):
+        fixture_list.sort(key=by_kickoff)
+
+    return {
+        'version': version,
+        'kickoffs': kickoffs,
+        'by_event': dict(by_event),
+        'by_team': dict(by_team),
+        'by_team_event': dict(by_team_event),
+        # Sorted kickoff timestamps alongside the fixtures they belong to, for bisecting by time
+        'by_kickoff': scheduled,
+        'kickoff_times': [kickoffs[f['id']].timestamp() for f in scheduled],
+        'team_kickoff_times': {team_id: [kickoffs[f['id']].timestamp() for f in team_fixtures] for team_id, team_fixtures in by_team.items()}
+    }
+
+def get_fixture_store(fixtures):
+    global fixture_store
+    version = get_data_version("fixtures/")
+    if fixture_store is None or version is None or fixture_store['version'] != version:
+        fixture_store = build_fixture_store(fixtures, version)
+    return fixture_store
+
+# Fixtures kicking off after the given time, in kickoff order, optionally for one team
+def get_upcoming_fixtures(store, after, team_id=None):
+    if team_id is None:
+        fixtures, times = store['by_kickoff'], store['kickoff_times']
+    else:
+        fixtures, times = store['by_team'].get(team_id, []), store['team_kickoff_times'].get(team_id, [])
+    return fixtures[bisect.bisect_right(times, after.timestamp()):]
+
+# End time of the most recent match to have finished by `now`, or None
+def get_last_match_finish(store, now):
+    times = store['kickoff_times']
+    index = bisect.bisect_right(times, (now - MATCH_DURATION).timestamp()) - 1
+    if index < 0:
+        return None
+    return datetime.fromtimestamp(times[index], timezone.utc) + MATCH_DURATION
+
+# End time of the next match still to finish after `now`, or None
+def get_next_match_finish(store, now):
+    times = store['kickoff_times']
+    index = bisect.bisect_right(times, (now - MATCH_DURATION).timestamp())
+    if index >= len(times):
+        return None
+    return datetime.fromtimestamp(times[index], timezone.utc) + MATCH_DURATION
+
+# Grid cell for one team in one gameweek: blank, single, or both opponents of a double gameweek
+def describe_gameweek_fixtures(gw_fixtures, team_id, teams):
+    if not gw_fixtures:
+        return {'opponent': '', 'fdr': 0}
+    labels = []
+    difficulties = []
+    for fixture in gw_fixtures:
+        if fixture['team_h'] == team_id:
+            labels.append(teams[fixture['team_a']]['short'].upper())
+            difficulties.append(fixture['team_h_difficulty'])
+        else:
+            labels.append(teams[fixture['team_h']]['short'].lower())
+            difficulties.append(fixture['team_a_difficulty'])
+    return {'opponent': ', '.join(labels), 'fdr': round(sum(difficulties) / len(difficulties))}
+
 # Function to fetch fixture data
 async def fetch_fixture_data(num_gameweeks, selected_teams=None, sort_method="alphabetical", start_gw=None, show_cups=False):
     # Fetch FPL data
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{FPL_API_BASE}fixtures/") as resp:
-            fixtures = await resp.json()
-        
-        async with session.get(f"{FPL_API_BASE}bootstrap-static/") as resp:
-            bootstrap = await resp.json()
+    fixtures, bootstrap = await asyncio.gather(
+        fetch_fpl_data("fixtures/"),
+        fetch_fpl_data("bootstrap-static/")
+    )
     
     # Fetch current standings from Football-Data.org API
-    current_standings = fetch_current_standings()
+    current_standings = await fetch_current_standings()
 
     # Create a mapping between FPL short names and Football-Data.org shortNames
     fpl_to_football_data = {
@@ -522,35 +1756,23 @@ async def fetch_fixture_data(num_gameweeks, selected_teams=None, sort_method="al
 
     # Create a mapping of team short names to their positions
     team_positions = {team['short']: team['position'] for team in teams.values()}
-    # Create a reverse mapping of aliases to team names
-    alias_to_team = {}
-    for team, aliases in team_aliases.items():
-        for alias in aliases:
-            alias_to_team[alias.lower()] = team
+    team_ids_by_name = {team['name']: id for id, team in teams.items()}
 
     # Filter teams if selected_teams is not empty
     if selected_teams:
         selected_team_ids = set()
         for team in selected_teams:
-            # Debug: Print all matches and scores
-            all_matches = process.extract(team.lower(), alias_to_team.keys(), limit=5)
-            print(f"Fuzzy matches for '{team}':")
-            for match, score in all_matches:
-                print(f"  {match}: {score}")
-
-            best_match, score = process.extractOne(team.lower(), alias_to_team.keys())
-            print(f"Best match for '{team}': {best_match} (score: {score})")
-
-            if score > 80:  # You can adjust this threshold
-                matched_team_name = alias_to_team[best_match]
-                matched_team = next((t for t in teams.values() if t['name'] == matched_team_name), None)
-                if matched_team:
-                    selected_team_ids.add(next(id for id, t in teams.items() if t['name'] == matched_team['name']))
-                    print(f"Added team: {matched_team['name']}")
+            matched_team_name = resolve_team(team)
+            print(f"Best match for '{team}': {matched_team_name}")
+
+            if matched_team_name:
+                if matched_team_name in team_ids_by_name:
+                    selected_team_ids.add(team_ids_by_name[matched_team_name])
+                    print(f"Added team: {matched_team_name}")
                 else:
                     print(f"Matched team not found in teams dictionary: {matched_team_name}")
             else:
-                print(f"No match found for '{team}' (best score: {score})")
+                print(f"No match found for '{team}'")
         
         if selected_team_ids:  # Only filter if we found matches
             filtered_teams = {id: team for id, team in teams.items() if id in selected_team_ids}
@@ -564,7 +1786,7 @@ async def fetch_fixture_data(num_gameweeks, selected_teams=None, sort_method="al
     
     if start_gw is None:
         if current_gw:
-            gw_deadline = datetime.strptime(current_gw['deadline_time'], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+            gw_deadline = parse_fpl_time(current_gw['deadline_time'])
             if current_time > gw_deadline:
                 start_gw = current_gw['id'] + 1
             else:
@@ -575,22 +1797,25 @@ async def fetch_fixture_data(num_gameweeks, selected_teams=None, sort_method="al
     end_gw = min(start_gw + num_gameweeks - 1, 38)
     actual_gameweeks = end_gw - start_gw + 1
 
-    fixture_data = {team['short']: [{'opponent': '', 'fdr': 0}] * actual_gameweeks for team in filtered_teams.values()}
-
-    for fixture in fixtures:
-        if start_gw <= fixture['event'] <= end_gw:
-            gw_index = fixture['event'] - start_gw
-            home_team = teams[fixture['team_h']]['short']
-            away_team = teams[fixture['team_a']]['short']
-            
-            if home_team in fixture_data:
-                fixture_data[home_team][gw_index] = {'opponent': away_team.upper(), 'fdr': fixture['team_h_difficulty']}
-            if away_team in fixture_data:
-                fixture_data[away_team][gw_index] = {'opponent': home_team.lower(), 'fdr': fixture['team_a_difficulty']}
+    # Each team's whole season is described so the renderer can cache one strip per team,
+    # then cut down to the requested gameweeks
+    store = get_fixture_store(fixtures)
+    season_fixture_data = {
+        team['short']: [
+            describe_gameweek_fixtures(store['by_team_event'].get((team_id, gw), []), team_id, teams)
+            for gw in range(1, SEASON_GAMEWEEKS + 1)
+        ]
+        for team_id, team in filtered_teams.items()
+    }
+    fixture_data = {team: season[start_gw - 1:end_gw] for team, season in season_fixture_data.items()}
 
     # Sort teams based on the specified method
     if sort_method == "fdr":
-        avg_fdr = {team: sum(f['fdr'] for f in fixtures if f['fdr'] != 0) / sum(1 for f in fixtures if f['fdr'] != 0) for team, fixtures in fixture_data.items()}
+        # Teams whose whole window is blank have no FDR to average, so they sort last
+        avg_fdr = {}
+        for team, fixtures in fixture_data.items():
+            scored = [f['fdr'] for f in fixtures if f['fdr'] != 0]
+            avg_fdr[team] = sum(scored) / len(scored) if scored else float('inf')
         sorted_teams = sorted(fixture_data.keys(), key=lambda x: avg_fdr[x])
     elif sort_method == "table":
         sorted_teams = sorted(fixture_data.keys(), key=lambda x: team_positions[x])
@@ -605,17 +1830,19 @@ async def fetch_fixture_data(num_gameweeks, selected_teams=None, sort_method="al
     print("Sorted teams:")
     for team in sorted_teams:
         if sort_method == "fdr":
-            print(f"{team}: Avg FDR {avg_fdr.get(team, 'N/A'):.2f}")
+            if avg_fdr[team] == float('inf'):
+                print(f"{team}: Avg FDR N/A (blank)")
+            else:
+                print(f"{team}: Avg FDR {avg_fdr[team]:.2f}")
         elif sort_method == "table":
             print(f"{team}: Position {team_positions[team]}")
         else:
             print(team)
 
-    # Get the dates for each gameweek
+    # Get the dates for every gameweek (the cached header strip covers the whole season)
     gw_dates = {}
     for event in bootstrap['events']:
-        if start_gw <= event['id'] <= end_gw:
-            gw_dates[event['id']] = datetime.strptime(event['deadline_time'], "%Y-%m-%dT%H:%M:%SZ").strftime("%d/%m")
+        gw_dates[event['id']] = parse_fpl_time(event['deadline_time']).strftime("%d/%m")
 
     # Load cup fixtures if show_cups is True
     cup_fixture_buckets = {}
@@ -626,8 +1853,8 @@ async def fetch_fixture_data(num_gameweeks, selected_teams=None, sort_method="al
         # Group cup fixtures by the gameweek they follow
         for competition, fixtures in cup_fixtures.items():
             for fixture in fixtures:
-                fixture_date = datetime.strptime(fixture['date'], "%Y-%m-%d")
-                gw = next((event['id'] for event in bootstrap['events'] if datetime.strptime(event['deadline_time'], "%Y-%m-%dT%H:%M:%SZ") > fixture_date), None)
+                fixture_date = datetime.strptime(fixture['date'], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+                gw = next((event['id'] for event in bootstrap['events'] if parse_fpl_time(event['deadline_time']) > fixture_date), None)
                 if gw:
                     if gw not in cup_fixture_buckets:
                         cup_fixture_buckets[gw] = []
@@ -644,10 +1871,106 @@ async def fetch_fixture_data(num_gameweeks, selected_teams=None, sort_method="al
                         'competition': competition
                     })
 
-    return fixture_data, start_gw, actual_gameweeks, {v['short']: v['name'] for v in filtered_teams.values()}, gw_dates, cup_fixture_buckets
+    return fixture_data, start_gw, actual_gameweeks, {v['short']: v['name'] for v in filtered_teams.values()}, gw_dates, cup_fixture_buckets, season_fixture_data
+
+# Pre-rendered strips of the full season fixture grid: one row of league fixture cells per team
+# and one row of gameweek headers. Every !fixtures request is a subset of this grid, so the
+# renderer crops the gameweeks it needs out of the strips and pastes them into place instead
+# of drawing each cell. Only strips for the current fixtures/bootstrap version are kept.
+SEASON_GAMEWEEKS = 38
+
+fixture_strips = {'version': None, 'rows': {}, 'header': None}
+fixture_strips_lock = threading.Lock()
+
+def get_fixture_strips(version):
+    global fixture_strips
+    if version is None:
+        # Unknown data version: build throwaway strips for this render only
+        return {'version': None, 'rows': {}, 'header': None}
+    with fixture_strips_lock:
+        if fixture_strips['version'] != version:
+            fixture_strips = {'version': version, 'rows': {}, 'header': None}
+        return fixture_strips
+
+# Pre-rasterized grid cells (an outlined, filled rectangle with centred text), keyed by
+# (label, bold, background colour, text colour, cell size). The same opponent tiles repeat
+# across every team strip and cup column, so grid cells become blits after the first draw.
+FIXTURE_TILE_CACHE_MAX_ENTRIES = 4096
+
+fixture_tiles = OrderedDict()
+fixture_tiles_lock = threading.Lock()
+
+def get_fixture_tile(label, bold, bg_color, text_color, cell_size, font, bold_font):
+    from PIL import Image, ImageDraw
+    key = (label, bold, bg_color, text_color, cell_size)
+    with fixture_tiles_lock:
+        tile = fixture_tiles.get(key)
+        if tile is not None:
+            fixture_tiles.move_to_end(key)
+            return tile
+    
+    cell_width, cell_height = cell_size
+    tile = Image.new('RGB', (cell_width + 1, cell_height + 1), color='white')
+    draw = ImageDraw.Draw(tile)
+    draw.rectangle([0, 0, cell_width, cell_height], fill=bg_color, outline='black')
+    if label:
+        draw.text((cell_width/2, cell_height/2), label, font=bold_font if bold else font, fill=text_color, anchor="mm")
+    
+    with fixture_tiles_lock:
+        fixture_tiles[key] = tile
+        while len(fixture_tiles) > FIXTURE_TILE_CACHE_MAX_ENTRIES:
+            fixture_tiles.popitem(last=False)
+    return tile
+
+# Black or white text, whichever reads better on the given background colour
+@functools.lru_cache(maxsize=None)
+def get_contrasting_text_color(color):
+    from PIL import ImageColor
+    bg_color = ImageColor.getrgb(color)
+    brightness = (bg_color[0] * 299 + bg_color[1] * 587 + bg_color[2] * 114) / 1000
+    return 'black' if brightness > 128 else 'white'
+
+def render_fixture_row_strip(season_fixtures, cell_width, cell_height, font, bold_font):
+    from PIL import Image
+    strip = Image.new('RGB', (SEASON_GAMEWEEKS * cell_width + 1, cell_height + 1), color='white')
+    for j in range(SEASON_GAMEWEEKS):
+        if j < len(season_fixtures):
+            fixture = season_fixtures[j]
+            is_home = fixture['opponent'].isupper()
+            tile = get_fixture_tile(fixture['opponent'], is_home, get_fixture_color(fixture), 'black', (cell_width, cell_height), font, bold_font)
+        else:
+            tile = get_fixture_tile('', False, 'white', 'black', (cell_width, cell_height), font, bold_font)
+        strip.paste(tile, (j * cell_width, 0))
+    return strip
+
+def render_gameweek_header_strip(gw_dates, cell_width, header_height, header_font, date_font):
+    from PIL import Image, ImageDraw
+    strip = Image.new('RGB', (SEASON_GAMEWEEKS * cell_width + 1, header_height + 1), color='white')
+    draw = ImageDraw.Draw(strip)
+    for j in range(SEASON_GAMEWEEKS):
+        gw = j + 1
+        x = j * cell_width
+        draw.rectangle([x, 0, x + cell_width, header_height], outline='black')
+        draw.text((x + cell_width/2, 10), gw_dates.get(gw, ""), font=date_font, fill='black', anchor="mt")
+        draw.text((x + cell_width/2, header_height - 10), f"GW{gw}", font=header_font, fill='black', anchor="mb")
+    return strip
+
+# Split the requested gameweeks into runs that can be pasted in one piece, breaking after any
+# gameweek followed by a cup column. Returns (first_gw, last_gw, starting column) for each run.
+def get_fixture_column_runs(start_gw, num_gameweeks, cup_fixture_buckets):
+    runs = []
+    column = 0
+    first_gw = start_gw
+    for gw in range(start_gw, start_gw + num_gameweeks):
+        if gw in cup_fixture_buckets or gw == start_gw + num_gameweeks - 1:
+            runs.append((first_gw, gw, column))
+            column += gw - first_gw + 1 + (1 if gw in cup_fixture_buckets else 0)
+            first_gw = gw + 1
+    return runs
 
 # Function to create fixture grid
-def create_fixture_grid(fixture_data, num_gameweeks, start_gw, team_names, gw_dates, sort_method, team_positions, team_points, cup_fixture_buckets):
+def create_fixture_grid(fixture_data, num_gameweeks, start_gw, team_names, gw_dates, sort_method, team_positions, team_points, cup_fixture_buckets, season_fixture_data, strip_version=None):
+    from PIL import Image, ImageDraw
     cell_width, cell_height = 100, 30
     team_column_width = 120
     position_column_width = 40 if sort_method == "table" else 0
@@ -666,10 +1989,10 @@ def create_fixture_grid(fixture_data, num_gameweeks, start_gw, team_names, gw_da
     image = Image.new('RGB', (width, height), color='white')
     draw = ImageDraw.Draw(image)
     
-    font = ImageFont.truetype("arial.ttf", 16)
-    bold_font = ImageFont.truetype("arialbd.ttf", 16)
-    header_font = ImageFont.truetype("arialbd.ttf", 16)
-    date_font = ImageFont.truetype("arial.ttf", 14)
+    font = get_font('regular', 16)
+    bold_font = get_font('bold', 16)
+    header_font = get_font('bold', 16)
+    date_font = get_font('regular', 14)
     
     # Draw headers for position, club, and points columns only if sort_method is "table"
     if sort_method == "table":
@@ -683,21 +2006,20 @@ def create_fixture_grid(fixture_data, num_gameweeks, start_gw, team_names, gw_da
     draw.rectangle([padding + position_column_width, padding + header_height_large - header_height_small, padding + position_column_width + team_column_width, padding + header_height_large], outline='black')
     draw.text((padding + position_column_width + 5, padding + header_height_large - 5), "Club", font=header_font, fill='black', anchor="lb")
     
-    # Draw headers and dates for gameweeks and cup fixtures
-    column = 0
-    for i in range(num_gameweeks):
-        gw = start_gw + i
-        x = padding + position_column_width + team_column_width + points_column_width + spacing + column * cell_width
-        draw.rectangle([x, padding, x + cell_width, padding + header_height_large], outline='black')
-        draw.text((x + cell_width/2, padding + 10), gw_dates.get(gw, ""), font=date_font, fill='black', anchor="mt")
-        draw.text((x + cell_width/2, padding + header_height_large - 10), f"GW{gw}", font=header_font, fill='black', anchor="mb")
-        column += 1
+    # Paste the gameweek headers from the season strip, with a CUP header after any gameweek that has cup fixtures
+    strips = get_fixture_strips(strip_version)
+    if strips['header'] is None:
+        strips['header'] = render_gameweek_header_strip(gw_dates, cell_width, header_height_large, header_font, date_font)
+    grid_x = padding + position_column_width + team_column_width + points_column_width + spacing
+    column_runs = get_fixture_column_runs(start_gw, num_gameweeks, cup_fixture_buckets)
+    for first_gw, last_gw, column in column_runs:
+        header = strips['header'].crop(((first_gw - 1) * cell_width, 0, last_gw * cell_width + 1, header_height_large + 1))
+        image.paste(header, (grid_x + column * cell_width, padding))
         
-        if gw in cup_fixture_buckets:
-            x = padding + position_column_width + team_column_width + points_column_width + spacing + column * cell_width
+        if last_gw in cup_fixture_buckets:
+            x = grid_x + (column + last_gw - first_gw + 1) * cell_width
             draw.rectangle([x, padding, x + cell_width, padding + header_height_large], fill='lightblue', outline='black')
             draw.text((x + cell_width/2, padding + header_height_large/2), "CUP", font=header_font, fill='black', anchor="mm")
-            column += 1
     
     # Draw team names, positions, points, and fixtures
     for i, (team_short, fixtures) in enumerate(fixture_data.items()):
@@ -718,48 +2040,26 @@ def create_fixture_grid(fixture_data, num_gameweeks, start_gw, team_names, gw_da
             draw.rectangle([padding + position_column_width + team_column_width, y, padding + position_column_width + team_column_width + points_column_width, y + cell_height], outline='black')
             draw.text((padding + position_column_width + team_column_width + points_column_width/2, y + cell_height/2), str(team_points.get(team_short, '')), font=bold_font, fill='black', anchor="mm")
         
-        column = 0
-        for j in range(num_gameweeks):
-            gw = start_gw + j
-            x = padding + position_column_width + team_column_width + points_column_width + spacing + column * cell_width
-            
-            # Draw league fixture
-            if j < len(fixtures):
-                fixture = fixtures[j]
-                color = get_fixture_color(fixture)
-                draw.rectangle([x, y, x + cell_width, y + cell_height], fill=color, outline='black')
-                
-                is_home = fixture['opponent'].isupper()
-                text_font = bold_font if is_home else font
-                
-                draw.text((x + cell_width/2, y + cell_height/2), fixture['opponent'], font=text_font, fill='black', anchor="mm")
-            else:
-                draw.rectangle([x, y, x + cell_width, y + cell_height], fill='white', outline='black')
-            
-            column += 1
+        # Paste this team's league fixtures from its season strip
+        if team_short not in strips['rows']:
+            strips['rows'][team_short] = render_fixture_row_strip(season_fixture_data.get(team_short, []), cell_width, cell_height, font, bold_font)
+        row_strip = strips['rows'][team_short]
+        for first_gw, last_gw, column in column_runs:
+            row = row_strip.crop(((first_gw - 1) * cell_width, 0, last_gw * cell_width + 1, cell_height + 1))
+            image.paste(row, (grid_x + column * cell_width, y))
             
             # Draw cup fixture if exists
-            if gw in cup_fixture_buckets:
-                x = padding + position_column_width + team_column_width + points_column_width + spacing + column * cell_width
+            if last_gw in cup_fixture_buckets:
+                x = grid_x + (column + last_gw - first_gw + 1) * cell_width
                 
-                cup_fixture = next((f for f in cup_fixture_buckets[gw] if f['team'] == team_short), None)
+                cup_fixture = next((f for f in cup_fixture_buckets[last_gw] if f['team'] == team_short), None)
                 if cup_fixture:
                     cup_color = CUP_COLORS.get(cup_fixture['competition'], 'lightblue')  # Default to lightblue if competition not found
-                    draw.rectangle([x, y, x + cell_width, y + cell_height], fill=cup_color, outline='black')
-                    
                     opponent = cup_fixture['opponent'].upper() if cup_fixture['is_home'] else cup_fixture['opponent'].lower()
-                    text_font = bold_font if cup_fixture['is_home'] else font
-                    
-                    # Determine text color based on background color brightness
-                    bg_color = ImageColor.getrgb(cup_color)
-                    brightness = (bg_color[0] * 299 + bg_color[1] * 587 + bg_color[2] * 114) / 1000
-                    text_color = 'black' if brightness > 128 else 'white'
-                    
-                    draw.text((x + cell_width/2, y + cell_height/2), opponent, font=text_font, fill=text_color, anchor="mm")
+                    tile = get_fixture_tile(opponent, cup_fixture['is_home'], cup_color, get_contrasting_text_color(cup_color), (cell_width, cell_height), font, bold_font)
                 else:
-                    draw.rectangle([x, y, x + cell_width, y + cell_height], fill='lightblue', outline='black')
-                
-                column += 1
+                    tile = get_fixture_tile('', False, 'lightblue', 'black', (cell_width, cell_height), font, bold_font)
+                image.paste(tile, (x, y))
     
     # Draw gridlines for fixture columns only
     for i in range(total_columns + 1):
@@ -806,17 +2106,13 @@ async def schedule(ctx, *, team_name=None):
     try:
         fixtures_data = await fetch_fpl_data("fixtures/")
         teams_data = await fetch_fpl_data("bootstrap-static/")
+        store = get_fixture_store(fixtures_data)
         
         team_map = {team['id']: team for team in teams_data['teams']}
         current_gw = next(gw for gw in teams_data['events'] if gw['is_current'])['id']
         
         if team_name:
-            team_name_lower = team_name.lower()
-            matched_team = None
-            for full_name, aliases in team_aliases.items():
-                if team_name_lower in [alias.lower() for alias in aliases] or team_name_lower == full_name.lower():
-                    matched_team = full_name
-                    break
+            matched_team = resolve_team(team_name)
             
             if matched_team:
                 team_id = next((team['id'] for team in teams_data['teams'] 
@@ -832,13 +2128,7 @@ async def schedule(ctx, *, team_name=None):
 
             current_time = datetime.now(timezone.utc)
 
-            upcoming_fixtures = [
-                fixture for fixture in fixtures_data
-                if datetime.strptime(fixture['kickoff_time'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc) > current_time
-            ]
-
-            team_fixtures = [f for f in upcoming_fixtures if f['team_h'] == team_id or f['team_a'] == team_id]
-            team_fixtures.sort(key=lambda x: x['event'])
+            team_fixtures = get_upcoming_fixtures(store, current_time, team_id)
 
             title_embed = Embed(title=f"Upcoming fixtures for {matched_team.title()}", color=Color.blue())
             embeds = [title_embed]
@@ -848,7 +2138,7 @@ async def schedule(ctx, *, team_name=None):
                 opponent = team_map[fixture['team_a' if is_home else 'team_h']]['name']
                 fdr = fixture['team_h_difficulty' if is_home else 'team_a_difficulty']
                 gw = fixture['event']
-                kickoff_time = datetime.strptime(fixture['kickoff_time'], "%Y-%m-%dT%H:%M:%SZ")
+                kickoff_time = store['kickoffs'][fixture['id']]
                 
                 # Convert to Unix timestamp for Discord
                 unix_timestamp = int(kickoff_time.timestamp())
@@ -866,15 +2156,14 @@ async def schedule(ctx, *, team_name=None):
             for fixture in team_fixtures[:5]:
                 print(f"Fixture: {fixture}")
 
-            await ctx.send(embeds=embeds)
+            await ctx.send(stale_data_note("fixtures/", "bootstrap-static/").strip() or None, embeds=embeds)
         else:
-            upcoming_fixtures = [f for f in fixtures_data if f['event'] == current_gw + 1]
-            upcoming_fixtures.sort(key=lambda x: x['kickoff_time'])
+            upcoming_fixtures = store['by_event'].get(current_gw + 1, [])
             
             # Group fixtures by day
             fixtures_by_day = defaultdict(list)
             for fixture in upcoming_fixtures:
-                kickoff_time = datetime.strptime(fixture['kickoff_time'], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+                kickoff_time = store['kickoffs'][fixture['id']]
                 day_key = kickoff_time.strftime("%A, %d %B %Y")  # Get day name and date
                 fixtures_by_day[day_key].append(fixture)
             
@@ -885,7 +2174,7 @@ async def schedule(ctx, *, team_name=None):
                 for fixture in fixtures:
                     home_team = team_map[fixture['team_h']]['name']
                     away_team = team_map[fixture['team_a']]['name']
-                    kickoff_time = datetime.strptime(fixture['kickoff_time'], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+                    kickoff_time = store['kickoffs'][fixture['id']]
                     unix_timestamp = int(kickoff_time.timestamp())
                     fixture_str = f"• {home_team} vs {away_team} - <t:{unix_timestamp}:R>, <t:{unix_timestamp}:t>"
                     fixture_strings.append(fixture_str)
@@ -894,7 +2183,7 @@ async def schedule(ctx, *, team_name=None):
                 day_fixtures = "\n".join(fixture_strings)
                 embed.add_field(name=f"**{day}**", value=day_fixtures, inline=False)
             
-            await ctx.send(embed=embed)
+            await ctx.send(stale_data_note("fixtures/", "bootstrap-static/").strip() or None, embed=embed)
 
     except Exception as e:
         print(f"An error occurred: {str(e)}")
@@ -909,15 +2198,10 @@ async def link(ctx, fpl_id: int = None):
 
     try:
         # Fetch user data from FPL API
-        user_data = await fetch_fpl_data(f"entry/{fpl_id}/")
+        user_data = await fetch_entry(fpl_id, live=False)
         team_name = user_data['name']
 
-        async with aiosqlite.connect('fpl_users.db') as db:
-            await db.execute('''
-                INSERT OR REPLACE INTO users (discord_id, fpl_id, team_name)
-                VALUES (?, ?, ?)
-            ''', (ctx.author.id, fpl_id, team_name))
-            await db.commit()
+        await set_linked_team(ctx.author.id, fpl_id, team_name)
 
         await ctx.send(f"Successfully linked your Discord account to FPL team: {team_name}")
     except Exception as e:
@@ -934,9 +2218,7 @@ async def link_error(ctx, error):
 @bot.command()
 async def myteam(ctx):
     try:
-        async with aiosqlite.connect('fpl_users.db') as db:
-            async with db.execute('SELECT fpl_id, team_name FROM users WHERE discord_id = ?', (ctx.author.id,)) as cursor:
-                result = await cursor.fetchone()
+        result = await get_linked_team(ctx.author.id)
 
         if result:
             fpl_id, team_name = result
@@ -947,17 +2229,23 @@ async def myteam(ctx):
         print(f"An error occurred: {str(e)}")
         await ctx.send("An error occurred while fetching your team information.")
 
-# Command to get my points
+# Command to get my points, in total or for one gameweek
 @bot.command()
-async def mypoints(ctx):
+async def mypoints(ctx, gameweek: int = None):
     try:
-        async with aiosqlite.connect('fpl_users.db') as db:
-            async with db.execute('SELECT fpl_id FROM users WHERE discord_id = ?', (ctx.author.id,)) as cursor:
-                result = await cursor.fetchone()
+        result = await get_linked_team(ctx.author.id)
 
-        if result:
+        if result and gameweek is not None:
+            fpl_id = result[0]
+            picks = await fetch_entry_picks(fpl_id, gameweek)
+            history = picks['entry_history']
+            message = f"Your GW{gameweek} points: {history['points']}"
+            if history.get('event_transfers_cost'):
+                message += f" (-{history['event_transfers_cost']} for transfers)"
+            await ctx.send(message)
+        elif result:
             fpl_id = result[0]
-            user_data = await fetch_fpl_data(f"entry/{fpl_id}/")
+            user_data = await fetch_entry(fpl_id)
             total_points = user_data['summary_overall_points']
             await ctx.send(f"Your total FPL points: {total_points}")
         else:
@@ -966,53 +2254,384 @@ async def mypoints(ctx):
         print(f"An error occurred: {str(e)}")
         await ctx.send("An error occurred while fetching your points.")
 
-# Function to get league standings
-async def fetch_league_standings(league_id):
-    async with aiohttp.ClientSession() as session:
-        # Fetch league standings
-        league_url = f"https://fantasy.premierleague.com/api/leagues-classic/{league_id}/standings/"
-        async with session.get(league_url) as resp:
-            if resp.status != 200:
-                raise Exception(f"League API request failed with status {resp.status}")
-            league_data = await resp.json()
-
-    standings = league_data['standings']['results']
-
-    async def fetch_team_data(entry):
-        team_id = entry['entry']
-        async with aiohttp.ClientSession() as session:
-            team_url = f"https://fantasy.premierleague.com/api/entry/{team_id}/"
-            try:
-                async with session.get(team_url) as resp:
-                    if resp.status == 200:
-                        team_data = await resp.json()
-                        entry['value'] = team_data.get('last_deadline_value', 0)
-                        entry['overall_rank'] = team_data.get('summary_overall_rank', 'N/A')
-                        print(f"Team {team_id}: Raw data: {team_data}")
-                    else:
-                        print(f"Team {team_id}: API request failed with status {resp.status}")
-                        entry['value'] = 0
-                        entry['overall_rank'] = 'N/A'
-            except Exception as e:
-                print(f"Team {team_id}: Error fetching data: {str(e)}")
-                entry['value'] = 0
-                entry['overall_rank'] = 'N/A'
-        print(f"Team {team_id}: Value={entry['value']}, OR={entry['overall_rank']}")
+# Command to show my recent gameweek history
+@bot.command()
+async def myhistory(ctx):
+    try:
+        result = await get_linked_team(ctx.author.id)
 
-    # Fetch team data concurrently
-    await asyncio.gather(*[fetch_team_data(entry) for entry in standings])
+        if result:
+            fpl_id = result[0]
+            rows = await fetch_entry_history(fpl_id)
+            if not rows:
+                await ctx.send("No gameweek history yet for your team.")
+                return
+            lines = [f"GW{row['event']}: {row['points']} pts, overall rank {row['overall_rank']}" for row in rows[-5:]]
+            await ctx.send("Your recent gameweeks:\n" + "\n".join(lines))
+        else:
+            await ctx.send("You haven't linked an FPL team yet. Use the !link command to link your team.")
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+        await ctx.send("An error occurred while fetching your history.")
+
+# Limits for fanning out many FPL API requests at once (e.g. one per league entry)
+FANOUT_CONCURRENCY = int(os.getenv('FPL_BOT_FANOUT_CONCURRENCY', '8'))
+FANOUT_RATE = float(os.getenv('FPL_BOT_FANOUT_RATE', '10'))  # Requests per second, shared by all FPL API requests
+FANOUT_BURST = 10
+FANOUT_RETRIES = 3
+FANOUT_BACKOFF_BASE = 0.5  # Seconds; doubled on each retry, with jitter
+FANOUT_MAX_RETRY_AFTER = FANOUT_BACKOFF_BASE * 2 ** FANOUT_RETRIES  # Longer Retry-After waits fail fast instead
+FANOUT_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+# Token bucket rate limiter: allows bursts of up to `capacity` requests, refilled at `rate` per second
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+fpl_rate_limiter = TokenBucket(FANOUT_RATE, FANOUT_BURST)
+
+# Request an FPL endpoint through the rate limiter, retrying timeouts, connection errors,
+# 429 and 5xx responses with jittered exponential backoff (or a short Retry-After). Returns (status, body, headers)
+# for a 200, or for a 304 when conditional headers were sent.
+async def request_fpl_data(endpoint, headers=None):
+    session = get_http_session()
+    url = f"{FPL_API_BASE}{endpoint}"
+    for attempt in range(FANOUT_RETRIES + 1):
+        # Checked before every attempt, so retries stop as soon as the circuit opens
+        check_circuit(url)
+        await fpl_rate_limiter.acquire()
+        retry_after = None
+        try:
+            async with session.get(url, headers=headers, timeout=FANOUT_REQUEST_TIMEOUT) as resp:
+                if resp.status == 200 or (resp.status == 304 and headers):
+                    record_request_success(url)
+                    return resp.status, await resp.read(), resp.headers
+                if resp.status != 429 and resp.status < 500:
+                    record_request_success(url)
+                    raise Exception(f"FPL API request for {endpoint} failed with status {resp.status}")
+                error = Exception(f"FPL API request for {endpoint} failed with status {resp.status}")
+                if resp.headers.get('Retry-After', '').isdigit():
+                    retry_after = int(resp.headers['Retry-After'])
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = e
+        record_request_failure(url)
+
+        # Waiting out a long Retry-After would stall every caller sharing this fetch,
+        # so give up and let them fall back to stale data instead
+        if attempt == FANOUT_RETRIES or (retry_after is not None and retry_after > FANOUT_MAX_RETRY_AFTER):
+            raise error
+        delay = retry_after if retry_after is not None else random.uniform(0, FANOUT_BACKOFF_BASE * 2 ** attempt)
+        print(f"Retrying {endpoint} in {delay:.2f}s after error: {error!r}")
+        await asyncio.sleep(delay)
+
+# Uncached fetch of an FPL endpoint with rate limiting and retries
+async def fetch_fpl_data_with_retry(endpoint):
+    status, body, headers = await request_fpl_data(endpoint)
+    return json.loads(body)
+
+# Run func over items with at most `concurrency` calls in flight, returning results in order.
+# A fixed set of workers pulls from the items, so large inputs don't create a task per item.
+async def fan_out(func, items, concurrency=FANOUT_CONCURRENCY):
+    items = list(items)
+    results = [None] * len(items)
+    pending = iter(enumerate(items))
+
+    async def worker():
+        for index, item in pending:
+            results[index] = await func(item)
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(items)))))
+    return results
+
+# The FPL API returns classic league standings in pages of this many entries
+LEAGUE_PAGE_SIZE = 50
+
+# Standings pages cached by (league_id, page), so every guild using the same league shares
+# them. How long a page stays valid depends on the gameweek when it was fetched: briefly while
+# a match is live, a while longer until the gameweek's points are final, and once the
+# gameweek is finished, until the next match kicks off (the standings can't change before then).
+LEAGUE_STANDINGS_LIVE_TTL = 60
+LEAGUE_STANDINGS_SETTLING_TTL = 900
+LEAGUE_STANDINGS_CACHE_MAX_PAGES = 500
+
+league_standings_cache = OrderedDict()  # (league_id, page) -> {'data', 'state', 'expires_at': datetime or None}
+league_standings_inflight = {}
+
+# Current gameweek state ("live", "settling" or "finished") and when standings fetched now
+# should expire, or None if they never will (the season is over)
+async def get_standings_expiry(now):
+    fixtures, bootstrap = await asyncio.gather(
+        fetch_fpl_data("fixtures/"),
+        fetch_fpl_data("bootstrap-static/")
+    )
+    store = get_fixture_store(fixtures)
+    next_finish = get_next_match_finish(store, now)
+    if next_finish is not None and next_finish - MATCH_DURATION <= now:
+        return "live", now + timedelta(seconds=LEAGUE_STANDINGS_LIVE_TTL)
+
+    upcoming = get_upcoming_fixtures(store, now)
+    next_kickoff = store['kickoffs'][upcoming[0]['id']] if upcoming else None
+    current_gw = next((event for event in bootstrap['events'] if event['is_current']), None)
+    if current_gw is not None and not (current_gw['finished'] and current_gw['data_checked']):
+        expires_at = now + timedelta(seconds=LEAGUE_STANDINGS_SETTLING_TTL)
+        return "settling", min(expires_at, next_kickoff) if next_kickoff else expires_at
+    return "finished", next_kickoff
+
+async def download_league_page(league_id, page):
+    data = await fetch_fpl_data_with_retry(f"leagues-classic/{league_id}/standings/?page_standings={page}")
+    now = datetime.now(timezone.utc)
+    try:
+        state, expires_at = await get_standings_expiry(now)
+    except Exception as e:
+        print(f"Could not work out the gameweek state: {str(e)}")
+        state, expires_at = "live", now + timedelta(seconds=LEAGUE_STANDINGS_LIVE_TTL)
+
+    league_standings_cache[(league_id, page)] = {'data': data, 'state': state, 'expires_at': expires_at}
+    league_standings_cache.move_to_end((league_id, page))
+    while len(league_standings_cache) > LEAGUE_STANDINGS_CACHE_MAX_PAGES:
+        league_standings_cache.popitem(last=False)
+    return data
+
+async def fetch_league_page(league_id, page):
+    key = (league_id, page)
+    cached = league_standings_cache.get(key)
+    if cached and (cached['expires_at'] is None or datetime.now(timezone.utc) < cached['expires_at']):
+        league_standings_cache.move_to_end(key)
+        return cached['data']
 
-    return standings
+    try:
+        return await single_flight(league_standings_inflight, key, lambda: download_league_page(league_id, page))
+    except Exception as e:
+        if cached is None:
+            raise
+        print(f"Serving stale standings for league {league_id} page {page} after fetch failed: {str(e)}")
+        return cached['data']
+
+# Per-entry data, classified by how often it changes:
+#   - entry/{id}/ points and ranks move with live scoring, so they expire with the gameweek
+#     state like league standings
+#   - entry/{id}/ team value, bank and names only change at a deadline
+#   - entry/{id}/history/ rows and entry/{id}/event/{gw}/picks/ for a finished, data-checked
+#     gameweek never change again, so they are persisted to SQLite and never refetched
+ENTRY_CACHE_MAX_ENTRIES = 5000
+
+# endpoint -> {'data', 'expires_at', 'deadline_expires_at', 'etag', 'last_modified'}. Bodies are also
+# persisted with their validators like other cached endpoints, so a restart starts warm and
+# expired entries are revalidated with a conditional request.
+entry_cache = OrderedDict()
+entry_inflight = {}
+
+# Gameweeks whose points are final: {event id: event}
+def get_final_gameweeks(bootstrap):
+    return {event['id']: event for event in bootstrap['events'] if event['finished'] and event['data_checked']}
+
+def get_next_deadline(bootstrap, now):
+    deadlines = [parse_fpl_time(event['deadline_time']) for event in bootstrap['events']]
+    return min((deadline for deadline in deadlines if deadline > now), default=None)
+
+def is_unexpired(expires_at, now):
+    return expires_at is None or now < expires_at
+
+# When entry data fetched at the given time expires: (live fields, deadline fields)
+async def get_entry_expiry(fetched_at):
+    try:
+        state, expires_at = await get_standings_expiry(fetched_at)
+        deadline_expires_at = get_next_deadline(await fetch_fpl_data("bootstrap-static/"), fetched_at)
+        # The live fields come in the same response, so they can't outlast the deadline fields
+        if deadline_expires_at is not None:
+            expires_at = min(expires_at, deadline_expires_at) if expires_at else deadline_expires_at
+    except Exception as e:
+        print(f"Could not work out the gameweek state: {str(e)}")
+        expires_at = deadline_expires_at = fetched_at + timedelta(seconds=LEAGUE_STANDINGS_LIVE_TTL)
+    return expires_at, deadline_expires_at
+
+async def store_entry_data(endpoint, data, etag, last_modified, fetched_at):
+    expires_at, deadline_expires_at = await get_entry_expiry(fetched_at)
+    entry_cache[endpoint] = {
+        'data': data,
+        'expires_at': expires_at,
+        'deadline_expires_at': deadline_expires_at,
+        'etag': etag,
+        'last_modified': last_modified
+    }
+    entry_cache.move_to_end(endpoint)
+    while len(entry_cache) > ENTRY_CACHE_MAX_ENTRIES:
+        entry_cache.popitem(last=False)
+
+# Seed the in-memory entry cache from the persisted response, with expiries worked out from
+# when it was originally fetched
+async def load_entry_data(endpoint):
+    try:
+        persisted = await load_persisted_response(endpoint)
+    except Exception as e:
+        print(f"Could not load cached {endpoint}: {str(e)}")
+        return
+    if persisted is None:
+        return
+    age = max(time.monotonic() - persisted['fetched_at'], 0)
+    fetched_at = datetime.now(timezone.utc) - timedelta(seconds=age)
+    await store_entry_data(endpoint, persisted['data'], persisted['etag'], persisted['last_modified'], fetched_at)
+
+async def download_entry_data(endpoint):
+    cached = entry_cache.get(endpoint)
+    request_headers = {}
+    if cached is not None:
+        if cached.get('etag'):
+            request_headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            request_headers['If-Modified-Since'] = cached['last_modified']
+
+    status, body, headers = await request_fpl_data(endpoint, request_headers)
+    if status == 304 and cached is not None:
+        data, etag, last_modified = cached['data'], cached['etag'], cached['last_modified']
+        await touch_persisted_response(endpoint)
+    else:
+        data = json.loads(body)
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        await persist_response(endpoint, body, etag, last_modified)
+
+    await store_entry_data(endpoint, data, etag, last_modified, datetime.now(timezone.utc))
+    return data
+
+# Fetch an entry endpoint through the in-memory cache. Callers that only use fields that change
+# at deadlines pass live=False and keep being served after the live fields have expired.
+async def fetch_entry_data(endpoint, live=True):
+    if endpoint not in entry_cache:
+        await load_entry_data(endpoint)
+    cached = entry_cache.get(endpoint)
+    if cached and is_unexpired(cached['expires_at' if live else 'deadline_expires_at'], datetime.now(timezone.utc)):
+        entry_cache.move_to_end(endpoint)
+        return cached['data']
+
+    try:
+        return await single_flight(entry_inflight, endpoint, lambda: download_entry_data(endpoint))
+    except Exception as e:
+        if cached is None:
+            raise
+        print(f"Serving stale {endpoint} after fetch failed: {str(e)}")
+        return cached['data']
+
+async def fetch_entry(entry_id, live=True):
+    return await fetch_entry_data(f"entry/{entry_id}/", live)
+
+# An entry's per-gameweek history rows, oldest first. Rows for final gameweeks come from
+# SQLite; the API is only asked again when a gameweek has become final since the last check
+# or one is still in progress.
+async def fetch_entry_history(entry_id):
+    bootstrap = await fetch_fpl_data("bootstrap-static/")
+    final_gameweeks = get_final_gameweeks(bootstrap)
+    latest_final = max(final_gameweeks, default=0)
+    current_gw = next((event for event in bootstrap['events'] if event['is_current']), None)
+    in_progress = current_gw is not None and current_gw['id'] not in final_gameweeks
+
+    records = await load_entry_records(entry_id, 'history')
+    # Event 0 records which final gameweek the stored rows were last checked against
+    checked_through = records.pop(0, {}).get('checked_through', 0)
+    if checked_through >= latest_final and not in_progress:
+        return [records[event] for event in sorted(records)]
+
+    data = await fetch_entry_data(f"entry/{entry_id}/history/")
+    rows = data['current']
+    final_rows = {row['event']: row for row in rows if row['event'] in final_gameweeks and row['event'] not in records}
+    final_rows[0] = {'checked_through': latest_final}
+    await save_entry_records(entry_id, 'history', final_rows)
+    return rows
+
+# An entry's picks for a gameweek; persisted for good once the gameweek is final. Final picks
+# are stored only as entry records, so they skip the response cache.
+async def fetch_entry_picks(entry_id, gw):
+    endpoint = f"entry/{entry_id}/event/{gw}/picks/"
+    if gw not in get_final_gameweeks(await fetch_fpl_data("bootstrap-static/")):
+        return await fetch_entry_data(endpoint)
+
+    stored = await load_entry_records(entry_id, 'picks', gw)
+    if gw in stored:
+        return stored[gw]
+    data = await single_flight(entry_inflight, endpoint, lambda: fetch_fpl_data_with_retry(endpoint))
+    await save_entry_records(entry_id, 'picks', {gw: data})
+    return data
+
+# Stream league entries ranked start_rank..end_rank one page at a time, fetching the next page
+# while the current one is being consumed. end_rank=None streams to the bottom of the league.
+async def stream_league_standings(league_id, start_rank=1, end_rank=None):
+    page = (start_rank - 1) // LEAGUE_PAGE_SIZE + 1
+    next_page = asyncio.create_task(fetch_league_page(league_id, page))
+    try:
+        while next_page is not None:
+            league_data = await next_page
+            next_page = None
+            standings = league_data['standings']
+            results = standings['results']
+
+            last_rank = results[-1].get('rank_sort', results[-1]['rank']) if results else 0
+            if standings.get('has_next') and (end_rank is None or last_rank < end_rank):
+                next_page = asyncio.create_task(fetch_league_page(league_id, standings['page'] + 1))
+
+            for entry in results:
+                rank = entry.get('rank_sort', entry['rank'])
+                if rank < start_rank:
+                    continue
+                if end_rank is not None and rank > end_rank:
+                    return
+                yield entry
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+async def fetch_team_data(entry):
+    team_id = entry['entry']
+    try:
+        team_data = await fetch_entry(team_id)
+        entry['value'] = team_data.get('last_deadline_value', 0)
+        entry['overall_rank'] = team_data.get('summary_overall_rank', 'N/A')
+        print(f"Team {team_id}: Raw data: {team_data}")
+    except Exception as e:
+        print(f"Team {team_id}: Error fetching data: {str(e)}")
+        entry['value'] = 0
+        entry['overall_rank'] = 'N/A'
+    print(f"Team {team_id}: Value={entry['value']}, OR={entry['overall_rank']}")
+
+# Stream league entries in chunks of chunk_size, each with team value and overall rank filled in,
+# so only one chunk is held in memory at a time
+async def stream_league_standings_chunks(league_id, chunk_size, start_rank=1, end_rank=None):
+    chunk = []
+    async for entry in stream_league_standings(league_id, start_rank, end_rank):
+        chunk.append(dict(entry))
+        if len(chunk) == chunk_size:
+            # Fetch team data concurrently, within the fan-out limits
+            await fan_out(fetch_team_data, chunk)
+            yield chunk
+            chunk = []
+    if chunk:
+        await fan_out(fetch_team_data, chunk)
+        yield chunk
 
 # Function to create leaderboard image
 def create_leaderboard_image(standings):
+    from PIL import Image, ImageDraw
     width, height = 1300, 70 + len(standings) * 60
     image = Image.new('RGB', (width, height), color='white')
     draw = ImageDraw.Draw(image)
     
-    font_regular = ImageFont.load_default().font_variant(size=24)
-    font_bold = ImageFont.load_default().font_variant(size=24)
-    font_header = ImageFont.load_default().font_variant(size=28)
+    font_regular = get_font('default', 24)
+    font_bold = get_font('default', 24)
+    font_header = get_font('default', 28)
     
     # Define column widths
     rank_width = 90
@@ -1058,7 +2677,7 @@ def create_leaderboard_image(standings):
         row_center = y + 30
         
         # Calculate positions for rank and indicator
-        rank_text_width = draw.textlength(str(entry['rank']), font=font_regular)
+        rank_text_width = get_text_width(str(entry['rank']), 'default', 24)
         indicator_width = 20
         total_width = rank_text_width + indicator_width + 5  # 5 px spacing
         start_x = rank_center - total_width // 2
@@ -1104,29 +2723,59 @@ def create_leaderboard_image(standings):
         # Draw row separator
         draw.line([(0, y + 59), (width, y + 59)], fill='lightgray', width=1)
     
-    img_byte_arr = io.BytesIO()
-    image.save(img_byte_arr, format='PNG')
-    img_byte_arr.seek(0)
-    return img_byte_arr
+    return image
+
+# Leaderboard output settings
+LEADERBOARD_ROWS_PER_IMAGE = 50
+LEADERBOARD_MAX_ROWS = 500  # Largest rank window a single command will render
+
+# Parse "!leaderboard" arguments into a (start_rank, end_rank) window:
+# "" -> the first image's worth, "N" -> top N, "A-B" -> ranks A to B, "all" -> the whole league (capped)
+def parse_rank_window(args):
+    args = args.strip().lower()
+    if not args:
+        return 1, LEADERBOARD_ROWS_PER_IMAGE
+    if args == "all":
+        return 1, LEADERBOARD_MAX_ROWS
+    if args.isdigit():
+        return 1, min(int(args), LEADERBOARD_MAX_ROWS)
+    start, sep, end = args.partition('-')
+    if sep and start.strip().isdigit() and end.strip().isdigit():
+        start_rank, end_rank = max(int(start), 1), int(end)
+        if end_rank >= start_rank:
+            return start_rank, min(end_rank, start_rank + LEADERBOARD_MAX_ROWS - 1)
+    return None
+
+# Render the leaderboard one image per LEADERBOARD_ROWS_PER_IMAGE rows, as the standings arrive
+async def render_leaderboard_images(league_id, start_rank, end_rank, encoding):
+    async for standings in stream_league_standings_chunks(league_id, LEADERBOARD_ROWS_PER_IMAGE, start_rank, end_rank):
+        print(f"Fetched standings: {standings[:2]}")  # Print first two entries for debugging
+        yield await run_render(render_leaderboard, standings, encoding)
 
 # Command to get league standings as a leaderboard image
 @bot.command()
-async def leaderboard(ctx):
+async def leaderboard(ctx, *, rank_window=""):
+    window = parse_rank_window(rank_window)
+    if window is None:
+        await ctx.send("Usage: !leaderboard [top N | start-end | all], e.g. !leaderboard 51-100")
+        return
+    start_rank, end_rank = window
+
     try:
-        async with aiosqlite.connect('fpl_users.db') as db:
-            async with db.execute('SELECT league_id FROM leagues WHERE guild_id = ?', (ctx.guild.id,)) as cursor:
-                result = await cursor.fetchone()
+        league_id = await get_guild_league(ctx.guild.id)
         
-        if result:
-            league_id = result[0]
+        if league_id is not None:
             await ctx.send("Fetching leaderboard data... This may take a moment.")
-            standings = await fetch_league_standings(league_id)
-            print(f"Fetched standings: {standings[:2]}")  # Print first two entries for debugging
-            image = create_leaderboard_image(standings)
-            if image is None:
-                await ctx.send("An error occurred while creating the leaderboard image. Check the console for details.")
-                return
-            await ctx.send(file=discord.File(fp=image, filename='leaderboard.png'))
+            # Send one image per chunk of rows as the pages arrive. Everyone asking for the same
+            # league and ranks while this is running shares the same fetches and renders.
+            encoding = get_image_encoding("leaderboard")
+            images_sent = 0
+            command_args = [league_id, start_rank, end_rank, encoding]
+            async for image_bytes in coalesce_command_stream("leaderboard", command_args, lambda: render_leaderboard_images(league_id, start_rank, end_rank, encoding)):
+                await send_image(ctx, image_bytes, image_filename(f'leaderboard_{images_sent + 1}', encoding))
+                images_sent += 1
+            if images_sent == 0:
+                await ctx.send(f"No entries found in this league between ranks {start_rank} and {end_rank}.")
         else:
             await ctx.send("No league has been set. Use !set_league command to set a league ID.")
     except Exception as e:
@@ -1137,23 +2786,49 @@ async def leaderboard(ctx):
 @bot.command()
 async def set_league(ctx, league_id: int):
     try:
-        async with aiosqlite.connect('fpl_users.db') as db:
-            await db.execute('INSERT OR REPLACE INTO leagues (guild_id, league_id) VALUES (?, ?)', (ctx.guild.id, league_id))
-            await db.commit()
+        await set_guild_league(ctx.guild.id, league_id)
         await ctx.send(f"League ID set to {league_id}")
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         await ctx.send("An error occurred while setting the league ID.")
 
+# Command to list every league registered in this server
+@bot.command()
+async def leagues(ctx):
+    try:
+        league_ids = await get_all_guild_leagues(ctx.guild.id)
+        default_league = await get_guild_league(ctx.guild.id)
+        if league_ids:
+            lines = [f"{league_id} (default)" if league_id == default_league else str(league_id) for league_id in league_ids]
+            await ctx.send("Leagues registered in this server:\n" + "\n".join(lines))
+        else:
+            await ctx.send("No leagues have been set. Use !set_league to add one.")
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+        await ctx.send("An error occurred while fetching the leagues.")
+
+# Command to remove a league from this server
+@bot.command()
+async def remove_league(ctx, league_id: int):
+    try:
+        removed, default_league = await remove_guild_league(ctx.guild.id, league_id)
+        if not removed:
+            await ctx.send(f"League {league_id} isn't registered in this server.")
+        elif default_league is None:
+            await ctx.send(f"League {league_id} removed. No leagues are left; use !set_league to add one.")
+        else:
+            await ctx.send(f"League {league_id} removed. The default league is {default_league}.")
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+        await ctx.send("An error occurred while removing the league.")
+
 # Command to get league ID
 @bot.command()
 async def get_league(ctx):
     try:
-        async with aiosqlite.connect('fpl_users.db') as db:
-            async with db.execute('SELECT league_id FROM leagues WHERE guild_id = ?', (ctx.guild.id,)) as cursor:
-                result = await cursor.fetchone()
-        if result:
-            await ctx.send(f"The current league ID is {result[0]}")
+        league_id = await get_guild_league(ctx.guild.id)
+        if league_id is not None:
+            await ctx.send(f"The current league ID is {league_id}")
         else:
             await ctx.send("No league ID has been set. Use !set_league to set one.")
     except Exception as e:
@@ -1162,4 +2837,7 @@ async def get_league(ctx):
 
 print("Registering commands...")
 print(f"Registered commands: {[command.name for command in bot.commands]}")
-bot.run(TOKEN)
\ No newline at end of file
+
+# Guarded so render worker processes can import this module without starting the bot
+if __name__ == "__main__":
+    bot.run(TOKEN)
\ No newline at end of file